@@ -0,0 +1,104 @@
+"""Compare CSV parse throughput of the c, pyarrow and parallel engines.
+
+Run from the repository root:
+
+    python backend/benchmarks/bench_csv_engines.py --scale 1.0
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import pandas as pd
+
+import services.csv_engines as csv_engines
+
+
+def write_wide(path: str, rows: int) -> None:
+    """200 columns: mostly floats, some integers and short strings."""
+    rng = np.random.default_rng(0)
+    columns = {}
+    for i in range(200):
+        if i % 10 == 0:
+            columns[f"label_{i}"] = rng.choice(["alpha", "beta", "gamma", "delta"], rows)
+        elif i % 3 == 0:
+            columns[f"count_{i}"] = rng.integers(0, 10_000, rows)
+        else:
+            columns[f"value_{i}"] = rng.normal(size=rows).round(4)
+    pd.DataFrame(columns).to_csv(path, index=False)
+
+
+def write_long(path: str, rows: int) -> None:
+    """8 columns of the shapes typical uploads have, many rows."""
+    rng = np.random.default_rng(0)
+    pd.DataFrame({
+        "id": np.arange(rows),
+        "date": rng.choice(pd.date_range("2020-01-01", periods=1000).strftime("%Y-%m-%d"), rows),
+        "category": rng.choice(["a", "b", "c", "d", "e"], rows),
+        "amount": rng.normal(100, 25, rows).round(2),
+        "quantity": rng.integers(1, 100, rows),
+        "flag": rng.choice([True, False], rows),
+        "comment": rng.choice(["", "ok", "late delivery", "refund, partial"], rows),
+        "score": np.where(rng.random(rows) < 0.05, np.nan, rng.random(rows))
+    }).to_csv(path, index=False)
+
+
+def write_edge(path: str, rows: int) -> None:
+    """Integers that do not fit int64, which pandas keeps as uint64 or text:
+    a regression case for the engines' dtype agreement."""
+    rng = np.random.default_rng(0)
+    ids = rng.integers(0, 1_000_000, rows).astype(str)
+    ids[::97] = "99999999999999999999"
+    pd.DataFrame({
+        "overflow": ids,
+        "unsigned": np.full(rows, 2**64 - 1, dtype=np.uint64),
+        "negative_overflow": np.where(np.arange(rows) % 2, "-99999999999999999999", "1"),
+        "amount": rng.normal(size=rows).round(2)
+    }).to_csv(path, index=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the row counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Benchmark the engines themselves, whatever the file size
+    csv_engines.CSV_PARALLEL_MIN_BYTES = 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = {
+            "wide": (write_wide, int(50_000 * args.scale)),
+            "long": (write_long, int(2_000_000 * args.scale)),
+            "edge": (write_edge, int(100_000 * args.scale))
+        }
+        print(f"{'file':<6} {'MB':>7} " + " ".join(f"{engine:>14}" for engine in csv_engines.ENGINES))
+        for name, (write, rows) in files.items():
+            path = os.path.join(directory, f"{name}.csv")
+            write(path, rows)
+            size_mb = os.path.getsize(path) / 1024**2
+
+            cells = []
+            reference = None
+            for engine in csv_engines.ENGINES:
+                best = float("inf")
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    df = csv_engines.read_csv(path, engine=engine)
+                    best = min(best, time.perf_counter() - started)
+                # Every engine must agree with the c engine's dtypes
+                dtypes = df.dtypes.astype(str).tolist()
+                if reference is None:
+                    reference = dtypes
+                elif dtypes != reference:
+                    raise RuntimeError(f"{engine} engine inferred different dtypes for {name}")
+                cells.append(f"{size_mb / best:9.1f} MB/s")
+            print(f"{name:<6} {size_mb:7.1f} " + " ".join(f"{cell:>14}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compare script job latency on warm interpreters against cold spawns.
+
+Run from the repository root:
+
+    python backend/benchmarks/bench_interpreter_pool.py --jobs 20
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from services.interpreter_pool import InterpreterPool
+
+SCRIPT = """
+import pandas as pd
+import numpy as np
+df = pd.DataFrame({"a": np.arange(1000)})
+print(df["a"].sum())
+"""
+
+
+def run_cold(script_path: str, cwd: str) -> None:
+    subprocess.run([sys.executable, script_path], capture_output=True, cwd=cwd, check=True)
+
+
+def run_warm(pool: InterpreterPool, script_path: str, cwd: str) -> None:
+    result = pool.run(script_path, cwd, os.path.join(cwd, "stdout.log"), os.path.join(cwd, "stderr.log"))
+    if result["returncode"] != 0:
+        raise RuntimeError("warm job failed")
+
+
+def measure(label: str, func, jobs: int) -> None:
+    latencies = []
+    for _ in range(jobs):
+        started = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    print(f"{label:<6} mean {statistics.mean(latencies):8.1f} ms   "
+          f"p50 {latencies[len(latencies) // 2]:8.1f} ms   "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        script_path = os.path.join(cwd, "script.py")
+        with open(script_path, "w") as f:
+            f.write(SCRIPT)
+
+        pool = InterpreterPool()
+        # Start the zygote outside the measurement, as a long-running server would
+        run_warm(pool, script_path, cwd)
+        try:
+            measure("cold", lambda: run_cold(script_path, cwd), args.jobs)
+            measure("warm", lambda: run_warm(pool, script_path, cwd), args.jobs)
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    main()
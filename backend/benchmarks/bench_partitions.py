@@ -0,0 +1,73 @@
+"""Measure how partition-parallel script jobs scale from 1 to N cores.
+
+Run from the repository root:
+
+    python backend/benchmarks/bench_partitions.py --rows 5000000 --max-workers 8
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import pandas as pd
+
+import services.script_executor as script_executor
+from services.script_executor import ScriptExecutor
+
+# Parses its partition and aggregates it; the reduce step merges the sums
+SCRIPT = """
+df = dataframes[list(dataframes.keys())[0]]
+result = df.groupby("category", as_index=False)["value"].sum()
+"""
+
+REDUCE = [{"op": "groupby", "by": ["category"], "aggregations": {"value": "sum"}}]
+
+
+def write_input(path: str, rows: int) -> None:
+    rng = np.random.default_rng(0)
+    pd.DataFrame({
+        "id": np.arange(rows),
+        "category": rng.choice(["a", "b", "c", "d"], rows),
+        "value": rng.normal(size=rows).round(6),
+        "label": rng.choice(["north", "south", "east", "west"], rows)
+    }).to_csv(path, index=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "data.csv")
+        write_input(input_path, args.rows)
+        size_mb = os.path.getsize(input_path) / 1024**2
+        print(f"{args.rows} rows, {size_mb:.0f} MB")
+
+        workers = 1
+        baseline = None
+        while workers <= args.max_workers:
+            script_executor.PARALLELISM = workers
+            started = time.perf_counter()
+            result = ScriptExecutor.execute_partitioned(
+                SCRIPT, [input_path], "out.csv",
+                {"by": "rows", "partitions": workers, "reduce": REDUCE}
+            )
+            elapsed = time.perf_counter() - started
+            if result["status"] != "completed":
+                raise RuntimeError(result["error"])
+            os.remove(result["output_file"])
+
+            baseline = baseline or elapsed
+            print(f"{workers:>3} workers  {elapsed:7.2f} s  {size_mb / elapsed:8.1f} MB/s  "
+                  f"speedup {baseline / elapsed:5.2f}x")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
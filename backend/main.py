@@ -1,11 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from routers.upload import router as upload_router
 from routers.process import router as process_router
-from routers.scripts import router as scripts_router
+from routers.scripts import router as scripts_router, purge_expired_jobs, download_output, OUTPUT_DIR
+from services.file_registry import file_registry
+from services.job_store import JOB_PURGE_INTERVAL, JOB_LEASE, job_store
+from starlette.concurrency import run_in_threadpool
 import os
 import sys
+import asyncio
 
 # Add the backend directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -30,14 +33,62 @@ app.add_middleware(
 os.makedirs("backend/uploads", exist_ok=True)
 os.makedirs("backend/outputs", exist_ok=True)
 
-# Mount static files for downloads
-app.mount("/api/download", StaticFiles(directory="backend/outputs"), name="download")
+
+# Load the file index once so lookups never scan the upload directory
+@app.on_event("startup")
+async def load_file_registry():
+    file_registry.rebuild()
+
+# Purge expired jobs and their outputs in the background
+async def purge_jobs_periodically():
+    while True:
+        try:
+            await run_in_threadpool(purge_expired_jobs)
+        except Exception:
+            # Retry on the next round
+            pass
+        await asyncio.sleep(JOB_PURGE_INTERVAL)
+
+# Keep the leases of this worker's jobs alive, and fail the jobs of workers
+# that are gone, whose leases ran out
+def renew_job_leases():
+    job_store.renew_leases()
+    job_store.fail_interrupted()
+
+async def renew_job_leases_periodically():
+    while True:
+        try:
+            await run_in_threadpool(renew_job_leases)
+        except Exception:
+            # Retry on the next round
+            pass
+        await asyncio.sleep(JOB_LEASE / 3)
+
+@app.on_event("startup")
+async def start_job_lease_renewal():
+    asyncio.create_task(renew_job_leases_periodically())
+
+@app.on_event("startup")
+async def start_job_purger():
+    asyncio.create_task(purge_jobs_periodically())
 
 # Include routers
 app.include_router(upload_router)
 app.include_router(process_router)
 app.include_router(scripts_router)
 
+# Job outputs by stored file name, served like every other download
+@app.api_route("/api/download/{filename}", methods=["GET", "HEAD"])
+async def download_output_file(filename: str, request: Request):
+    output_file = os.path.join(OUTPUT_DIR, filename)
+    # Hidden files are partial outputs and stored hashes
+    if filename.startswith('.') or os.path.basename(filename) != filename or not os.path.isfile(output_file):
+        raise HTTPException(
+            status_code=404,
+            detail="File not found"
+        )
+    return await download_output(output_file, filename.split('_', 1)[-1], request)
+
 # Health check endpoint
 @app.get("/api/health")
 async def health_check():
@@ -18,17 +18,59 @@ class CSVInfo(BaseModel):
     missing_values: Dict[str, int]
     memory_usage: str
     file_size: str
+    # Memory of the loaded frame when COMPACT_LOAD is on
+    compact_memory_usage: Optional[str] = None
 
 class CSVPreview(BaseModel):
     headers: List[str]
     rows: List[List[Any]]
     total_rows: int
     preview_rows: int
+    offset: int = 0
+    total_rows_estimated: bool = False
+
+class InputSchema(BaseModel):
+    columns: Optional[List[str]] = None
+    dtypes: Optional[Dict[str, str]] = None
+    # Parse dates, nullable integers and categoricals as inferred on upload
+    infer_types: bool = False
+    # Load with compact dtypes (always on with COMPACT_LOAD)
+    compact: bool = False
+
+class ResourceLimits(BaseModel):
+    timeout: Optional[float] = None
+    max_memory: Optional[int] = None
+    max_cpu_seconds: Optional[int] = None
+
+class PartitionSpec(BaseModel):
+    # "file": one partition per input file; "rows": row ranges of the first input
+    by: str = "file"
+    partitions: Optional[int] = None
+    # Pipeline steps applied to the concatenated partition outputs
+    reduce: Optional[List[Dict[str, Any]]] = None
 
 class ScriptExecutionRequest(BaseModel):
     script: str
     input_files: List[str]
     output_filename: str
+    priority: int = 0
+    input_schema: Optional[Dict[str, InputSchema]] = None
+    use_cache: bool = True
+    limits: Optional[ResourceLimits] = None
+    partition: Optional[PartitionSpec] = None
+    # "gzip", "zstd" or "none"; defaults to OUTPUT_COMPRESSION
+    output_compression: Optional[str] = None
+
+class PipelineExecutionRequest(BaseModel):
+    steps: List[Dict[str, Any]]
+    input_files: List[str]
+    output_filename: str
+    priority: int = 0
+    use_cache: bool = True
+    # "auto", "memory" or "streaming" (chunked, for inputs larger than memory)
+    mode: str = "auto"
+    # "gzip", "zstd" or "none"; defaults to OUTPUT_COMPRESSION
+    output_compression: Optional[str] = None
 
 class ScriptExecutionResponse(BaseModel):
     job_id: str
@@ -36,6 +78,8 @@ class ScriptExecutionResponse(BaseModel):
     output_file: Optional[str] = None
     logs: List[str]
     error: Optional[str] = None
+    queue_position: Optional[int] = None
+    resources: Optional[Dict[str, Any]] = None
 
 class FileListResponse(BaseModel):
     files: List[FileUploadResponse]
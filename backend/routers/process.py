@@ -1,22 +1,22 @@
 from fastapi import APIRouter, HTTPException
-from services.csv_analyzer import CSVAnalyzer
+from fastapi.responses import StreamingResponse
+from services.csv_analyzer import CSVAnalyzer, TooLargeToLoad
+from services.file_registry import file_registry
+from services.dataframe_cache import dataframe_cache
 from models.schemas import CSVInfo, CSVPreview
 import os
+import json
+import pandas as pd
+from typing import Optional
 
 router = APIRouter(prefix="/api/process", tags=["process"])
 
-UPLOAD_DIR = "backend/uploads"
-
 @router.get("/files/{file_id}/info", response_model=CSVInfo)
 async def get_file_info(file_id: str):
     """Get detailed information about a CSV file."""
     try:
         # Find the file
-        file_path = None
-        for filename in os.listdir(UPLOAD_DIR):
-            if filename.startswith(f"{file_id}_"):
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                break
+        file_path = file_registry.get_path(file_id)
         
         if not file_path or not os.path.exists(file_path):
             raise HTTPException(
@@ -28,6 +28,8 @@ async def get_file_info(file_id: str):
         info = CSVAnalyzer.analyze_csv(file_path)
         return info
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -35,15 +37,22 @@ async def get_file_info(file_id: str):
         )
 
 @router.get("/files/{file_id}/preview", response_model=CSVPreview)
-async def get_file_preview(file_id: str, max_rows: int = 100):
-    """Get a preview of the CSV file."""
+async def get_file_preview(file_id: str, max_rows: int = 100, offset: int = 0, limit: Optional[int] = None):
+    """Get a preview of the CSV file.
+
+    offset/limit page through the file; limit defaults to max_rows.
+    """
     try:
+        if limit is None:
+            limit = max_rows
+        if offset < 0 or limit < 0:
+            raise HTTPException(
+                status_code=400,
+                detail="offset and limit must not be negative"
+            )
+        
         # Find the file
-        file_path = None
-        for filename in os.listdir(UPLOAD_DIR):
-            if filename.startswith(f"{file_id}_"):
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                break
+        file_path = file_registry.get_path(file_id)
         
         if not file_path or not os.path.exists(file_path):
             raise HTTPException(
@@ -52,25 +61,64 @@ async def get_file_preview(file_id: str, max_rows: int = 100):
             )
         
         # Get preview
-        preview = CSVAnalyzer.get_preview(file_path, max_rows)
+        preview = CSVAnalyzer.get_preview(file_path, limit, offset)
         return preview
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error getting file preview: {str(e)}"
         )
 
+@router.get("/files/{file_id}/preview/stream")
+async def stream_file_preview(file_id: str, max_rows: int = 100):
+    """Stream the first rows of the CSV file as newline-delimited JSON.
+
+    The first line holds the headers and row count; every following line is
+    one row, sent as soon as its chunk is parsed.
+    """
+    # Find the file
+    file_path = file_registry.get_path(file_id)
+    
+    if not file_path or not os.path.exists(file_path):
+        raise HTTPException(
+            status_code=404,
+            detail="File not found"
+        )
+    
+    try:
+        headers = list(pd.read_csv(file_path, nrows=0).columns)
+        total_rows, exact = CSVAnalyzer.count_rows(file_path)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting file preview: {str(e)}"
+        )
+    
+    def generate():
+        yield json.dumps({
+            "headers": headers,
+            "total_rows": total_rows,
+            "total_rows_estimated": not exact
+        }) + "\n"
+        for row in CSVAnalyzer.iter_preview(file_path, max_rows):
+            yield json.dumps(row) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @router.get("/files/{file_id}/column/{column_name}/stats")
-async def get_column_stats(file_id: str, column_name: str):
-    """Get statistics for a specific column."""
+async def get_column_stats(file_id: str, column_name: str, mode: str = "exact", error: float = 0.01):
+    """Get statistics for a specific column.
+
+    mode=approx computes sketch-based statistics in one streaming pass for
+    files too large to load, within the requested relative error; exact
+    stats of such files are refused with 413.
+    """
     try:
         # Find the file
-        file_path = None
-        for filename in os.listdir(UPLOAD_DIR):
-            if filename.startswith(f"{file_id}_"):
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                break
+        file_path = file_registry.get_path(file_id)
         
         if not file_path or not os.path.exists(file_path):
             raise HTTPException(
@@ -78,10 +126,26 @@ async def get_column_stats(file_id: str, column_name: str):
                 detail="File not found"
             )
         
+        if mode not in ("exact", "approx"):
+            raise HTTPException(
+                status_code=400,
+                detail="mode must be 'exact' or 'approx'"
+            )
+        
         # Get column stats
-        stats = CSVAnalyzer.get_column_stats(file_path, column_name)
+        if mode == "approx":
+            stats = CSVAnalyzer.get_column_stats_approx(file_path, column_name, error)
+        else:
+            stats = CSVAnalyzer.get_column_stats(file_path, column_name)
         return stats
         
+    except HTTPException:
+        raise
+    except TooLargeToLoad as e:
+        raise HTTPException(
+            status_code=413,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -93,11 +157,7 @@ async def get_columns(file_id: str):
     """Get all column names from a CSV file."""
     try:
         # Find the file
-        file_path = None
-        for filename in os.listdir(UPLOAD_DIR):
-            if filename.startswith(f"{file_id}_"):
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                break
+        file_path = file_registry.get_path(file_id)
         
         if not file_path or not os.path.exists(file_path):
             raise HTTPException(
@@ -105,17 +165,18 @@ async def get_columns(file_id: str):
                 detail="File not found"
             )
         
-        # Read CSV and get columns
-        import pandas as pd
-        df = pd.read_csv(file_path)
-        
-        return {
-            "columns": list(df.columns),
-            "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()}
-        }
+        # Answered from the profile, without loading the data
+        return CSVAnalyzer.get_columns(file_path)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error getting columns: {str(e)}"
         )
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Get hit/miss counters for the parsed DataFrame cache."""
+    return dataframe_cache.stats()
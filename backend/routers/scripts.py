@@ -1,18 +1,35 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Header, Query, Request
+from fastapi.responses import StreamingResponse
 from services.script_executor import ScriptExecutor
-from models.schemas import ScriptExecutionRequest, ScriptExecutionResponse
+from services.job_scheduler import job_scheduler, QueueFull
+from services.job_logs import JobLog, OutputTail
+from services.job_store import job_store, FINISHED_STATUSES, JOB_TTL
+from services.result_cache import result_cache, link_or_copy
+from services.file_registry import file_registry
+from starlette.concurrency import run_in_threadpool
+from services.pipeline import Pipeline, PipelineError, PipelineCancelled
+from services.partitions import Partitioner
+from services.compression import OUTPUT_COMPRESSION, compression_of, with_compression, validate as validate_compression
+from services.downloads import file_response, content_hash, remove_content_hash
+from models.schemas import ScriptExecutionRequest, ScriptExecutionResponse, PipelineExecutionRequest
 import os
+import json
+import time
 import uuid
-from typing import List, Dict
+import asyncio
+import threading
+from typing import List, Dict, Any, Optional
 
 router = APIRouter(prefix="/api/scripts", tags=["scripts"])
 
-# In-memory job storage (in production, use Redis or database)
-job_status = {}
+# Seconds between checks for new log lines on a log stream
+LOG_STREAM_POLL_INTERVAL = 0.25
+
+OUTPUT_DIR = "backend/outputs"
 
 @router.post("/execute", response_model=ScriptExecutionResponse)
-async def execute_script(request: ScriptExecutionRequest, background_tasks: BackgroundTasks):
-    """Execute a Python script with provided CSV files."""
+async def execute_script(request: ScriptExecutionRequest):
+    """Queue a Python script for execution with provided CSV files."""
     job_id = str(uuid.uuid4())
     
     # Validate input files
@@ -23,64 +40,183 @@ async def execute_script(request: ScriptExecutionRequest, background_tasks: Back
                 detail=f"Input file not found: {file_path}"
             )
     
-    # Initialize job status
-    job_status[job_id] = {
-        "status": "processing",
-        "logs": [],
-        "output_file": None,
-        "error": None
+    input_schema = {
+        file_path: schema.model_dump()
+        for file_path, schema in (request.input_schema or {}).items()
     }
+    output_filename = _output_filename(request.output_filename, request.output_compression)
+    
+    partition = request.partition.model_dump() if request.partition else None
+    if partition is not None:
+        try:
+            Partitioner.validate(partition, len(request.input_files))
+            if partition["reduce"]:
+                Pipeline.validate(partition["reduce"], 1)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=str(e)
+            )
     
-    # Execute script in background
-    background_tasks.add_task(
+    # Identical runs are answered from the result cache without running
+    cache_key = None
+    if request.use_cache:
+        # Partitioning changes what the script sees, so it is part of the key
+        spec = request.script
+        if partition is not None:
+            spec = json.dumps({"script": request.script, "partition": partition}, sort_keys=True)
+        cache_key = await run_in_threadpool(
+            _cache_key, spec, request.input_files, output_filename, input_schema
+        )
+        cached = await run_in_threadpool(_cached_response, job_id, cache_key, output_filename)
+        if cached is not None:
+            return cached
+    
+    # Hand the script to the job scheduler's worker pool
+    return _queue_job(
+        job_id,
+        request.priority,
         process_script,
         job_id,
         request.script,
         request.input_files,
-        request.output_filename
+        output_filename,
+        input_schema,
+        cache_key,
+        request.limits.model_dump() if request.limits else None,
+        partition
     )
+
+@router.post("/pipeline", response_model=ScriptExecutionResponse)
+async def execute_pipeline(request: PipelineExecutionRequest):
+    """Queue a declarative transform pipeline.
+
+    Pipelines run inside the server's job workers without starting a Python
+    process for the job.
+    """
+    job_id = str(uuid.uuid4())
     
-    return ScriptExecutionResponse(
-        job_id=job_id,
-        status="processing",
-        logs=[],
-        output_file=None,
-        error=None
+    for file_path in request.input_files:
+        if not os.path.exists(file_path):
+            raise HTTPException(
+                status_code=404,
+                detail=f"Input file not found: {file_path}"
+            )
+    
+    try:
+        Pipeline.validate(request.steps, len(request.input_files))
+        # Sizing a compressed input decompresses it, so not on the event loop
+        await run_in_threadpool(Pipeline.choose_mode, request.steps, request.input_files, request.mode)
+    except PipelineError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    output_filename = _output_filename(request.output_filename, request.output_compression)
+    
+    cache_key = None
+    if request.use_cache:
+        spec = json.dumps({"pipeline": request.steps}, sort_keys=True)
+        cache_key = await run_in_threadpool(
+            _cache_key, spec, request.input_files, output_filename, {}
+        )
+        cached = await run_in_threadpool(_cached_response, job_id, cache_key, output_filename)
+        if cached is not None:
+            return cached
+    
+    return _queue_job(
+        job_id,
+        request.priority,
+        process_pipeline,
+        job_id,
+        request.steps,
+        request.input_files,
+        output_filename,
+        request.mode,
+        cache_key
     )
 
 @router.get("/jobs/{job_id}", response_model=ScriptExecutionResponse)
 async def get_job_status(job_id: str):
     """Get the status of a script execution job."""
-    if job_id not in job_status:
-        raise HTTPException(
-            status_code=404,
-            detail="Job not found"
-        )
+    job = _get_job(job_id)
+    return ScriptExecutionResponse(
+        job_id=job_id,
+        status=job["status"],
+        logs=_job_logs(job),
+        output_file=job["output_file"],
+        error=job["error"],
+        queue_position=job_scheduler.position(job_id),
+        resources=job["resources"]
+    )
+
+@router.post("/jobs/{job_id}/cancel", response_model=ScriptExecutionResponse)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job."""
+    job = _get_job(job_id)
+    if job["status"] in ("queued", "processing"):
+        job_scheduler.cancel(job_id)
+        if job["status"] == "queued":
+            # Also stops jobs queued by another server worker from starting
+            job_store.update(job_id, status="cancelled", error="Job was cancelled")
+            job = _get_job(job_id)
     
-    job = job_status[job_id]
     return ScriptExecutionResponse(
         job_id=job_id,
         status=job["status"],
-        logs=job["logs"],
+        logs=_job_logs(job),
         output_file=job["output_file"],
         error=job["error"]
     )
 
+@router.get("/jobs/{job_id}/logs/stream")
+async def stream_job_logs(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """Stream a job's log as Server-Sent Events while it runs.
+
+    Each line is sent as a message whose id is its line number, so a client
+    that reconnects with Last-Event-ID only receives the lines it missed. An
+    "end" event carrying the final status closes the stream.
+    """
+    _get_job(job_id)
+    skip = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    
+    async def events():
+        tail = OutputTail(JobLog.log_path(job_id))
+        line_number = 0
+        while True:
+            job = job_store.get(job_id)
+            finished = job is None or job["status"] in FINISHED_STATUSES
+            for line in tail.read_lines(final=finished):
+                line_number += 1
+                if line_number > skip:
+                    yield f"id: {line_number}\ndata: {line}\n\n"
+            if finished:
+                end = {"status": job["status"] if job else "deleted",
+                       "output_file": job["output_file"] if job else None}
+                yield f"event: end\ndata: {json.dumps(end)}\n\n"
+                return
+            await asyncio.sleep(LOG_STREAM_POLL_INTERVAL)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
 @router.get("/templates")
 async def get_script_templates():
     """Get available script templates."""
     return ScriptExecutor.get_script_templates()
 
-@router.get("/download/{job_id}/{filename}")
-async def download_result(job_id: str, filename: str):
-    """Download the result file from a completed job."""
-    if job_id not in job_status:
-        raise HTTPException(
-            status_code=404,
-            detail="Job not found"
-        )
-    
-    job = job_status[job_id]
+@router.api_route("/download/{job_id}/{filename}", methods=["GET", "HEAD"])
+async def download_result(job_id: str, filename: str, request: Request):
+    """Download the result file from a completed job.
+
+    Downloads are resumable with Range and tagged with the result's content
+    hash; compressed results are sent as stored to clients accepting their
+    encoding.
+    """
+    job = _get_job(job_id)
     if job["status"] != "completed" or not job["output_file"]:
         raise HTTPException(
             status_code=404,
@@ -93,48 +229,258 @@ async def download_result(job_id: str, filename: str):
             detail="Result file not found"
         )
     
-    from fastapi.responses import FileResponse
-    
-    return FileResponse(
-        job["output_file"],
-        media_type='text/csv',
-        filename=filename
-    )
+    return await download_output(job["output_file"], filename, request)
+
+async def download_output(output_file: str, filename: str, request: Request):
+    """Response sending a job output file; its content hash is computed on
+    the first download and kept next to it."""
+    sha256 = await run_in_threadpool(content_hash, output_file)
+    return file_response(output_file, filename, request.headers, sha256)
 
-def process_script(job_id: str, script_content: str, input_files: List[str], output_filename: str):
-    """Process the script execution in background."""
+def process_script(job_id: str, script_content: str, input_files: List[str], output_filename: str,
+                   input_schema: Dict[str, Dict], cache_key: Optional[str],
+                   limits: Optional[Dict[str, Any]], partition: Optional[Dict[str, Any]],
+                   cancel_event: threading.Event):
+    """Process the script execution on a scheduler worker.
+
+    Partitioned jobs fan out over several processes from this one worker.
+    """
+    job = job_store.get(job_id)
+    if job is None or job["status"] != "queued":
+        return
+    
+    # Log lines are written to the job's log file as they come
+    job_log = JobLog(job_id)
+    job_store.update(job_id, status="processing")
+    
     try:
-        result = ScriptExecutor.execute_script(script_content, input_files, output_filename)
+        options = dict(
+            job_id=job_id,
+            cancel_event=cancel_event,
+            input_schema=input_schema,
+            on_log=job_log.append,
+            limits=limits
+        )
+        if partition is not None:
+            result = ScriptExecutor.execute_partitioned(
+                script_content, input_files, output_filename, partition, **options
+            )
+        else:
+            result = ScriptExecutor.execute_script(script_content, input_files, output_filename, **options)
+        job_log.close()
+        
+        if cache_key and result["status"] == "completed":
+            try:
+                result_cache.put(cache_key, result["output_file"], job_log.tail())
+            except OSError:
+                # Caching is best effort
+                pass
         
         # Update job status
-        job_status[job_id].update({
-            "status": result["status"],
-            "logs": result["logs"],
-            "output_file": result["output_file"],
-            "error": result["error"]
-        })
+        job_store.update(
+            job_id,
+            status=result["status"],
+            logs=job_log.tail(),
+            output_file=result["output_file"],
+            error=result["error"],
+            resources=result["resources"]
+        )
+        
+    except Exception as e:
+        job_log.append(str(e))
+        job_log.close()
+        job_store.update(
+            job_id,
+            status="failed",
+            logs=job_log.tail(),
+            output_file=None,
+            error=str(e)
+        )
+
+def process_pipeline(job_id: str, steps: List[Dict[str, Any]], input_files: List[str],
+                     output_filename: str, mode: str, cache_key: Optional[str],
+                     cancel_event: threading.Event):
+    """Run a pipeline in-process on a scheduler worker."""
+    job = job_store.get(job_id)
+    if job is None or job["status"] != "queued":
+        return
+    
+    job_log = JobLog(job_id)
+    job_store.update(job_id, status="processing")
+    
+    output_file = os.path.join(OUTPUT_DIR, f"{job_id}_{output_filename}")
+    part_file = os.path.join(OUTPUT_DIR, f".{job_id}_{output_filename}.part")
+    try:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        stats = Pipeline.run(
+            steps, input_files, part_file, log=job_log.append, cancel_event=cancel_event, mode=mode,
+            compression=compression_of(output_filename)
+        )
+        os.replace(part_file, output_file)
+        job_log.append(f"Output file created: {output_file}")
+        job_log.close()
         
+        if cache_key:
+            try:
+                result_cache.put(cache_key, output_file, job_log.tail())
+            except OSError:
+                # Caching is best effort
+                pass
+        
+        job_store.update(
+            job_id,
+            status="completed",
+            logs=job_log.tail(),
+            output_file=output_file,
+            error=None,
+            resources={"wall_time": stats["wall_time"], "mode": stats["mode"]}
+        )
+    
     except Exception as e:
-        job_status[job_id].update({
-            "status": "failed",
-            "logs": [str(e)],
-            "output_file": None,
-            "error": str(e)
-        })
+        if os.path.exists(part_file):
+            os.remove(part_file)
+        job_log.append(str(e))
+        job_log.close()
+        job_store.update(
+            job_id,
+            status="cancelled" if isinstance(e, PipelineCancelled) else "failed",
+            logs=job_log.tail(),
+            output_file=None,
+            error=str(e)
+        )
 
 @router.get("/jobs")
-async def list_jobs():
-    """List all jobs (for debugging)."""
-    return {"jobs": list(job_status.keys())}
+async def list_jobs(status: Optional[str] = None,
+                    limit: int = Query(50, ge=1, le=1000),
+                    offset: int = Query(0, ge=0)):
+    """List jobs, newest first, optionally filtered by status."""
+    jobs, total = job_store.list(status=status, limit=limit, offset=offset)
+    return {
+        "jobs": [
+            {
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "output_file": job["output_file"],
+                "error": job["error"],
+                "created_at": job["created_at"],
+                "finished_at": job["finished_at"]
+            }
+            for job in jobs
+        ],
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "scheduler": job_scheduler.stats()
+    }
 
 @router.delete("/jobs/{job_id}")
 async def delete_job(job_id: str):
-    """Delete a job from status tracking."""
-    if job_id in job_status:
-        del job_status[job_id]
+    """Delete a job from status tracking, cancelling it if still pending."""
+    job = job_store.get(job_id)
+    if job is not None:
+        job_scheduler.cancel(job_id)
+        job_store.delete(job_id)
+        JobLog.remove(job_id)
         return {"message": "Job deleted"}
     
     raise HTTPException(
         status_code=404,
         detail="Job not found"
     )
+
+def purge_expired_jobs(ttl: int = JOB_TTL) -> int:
+    """Delete jobs that finished more than ttl seconds ago with their output
+    and log files. Returns the number of jobs purged."""
+    expired = job_store.pop_expired(ttl)
+    for job in expired:
+        if job["output_file"] and os.path.exists(job["output_file"]):
+            os.remove(job["output_file"])
+        if job["output_file"]:
+            remove_content_hash(job["output_file"])
+        JobLog.remove(job["job_id"])
+    return len(expired)
+
+def _output_filename(output_filename: str, compression: Optional[str]) -> str:
+    """Name of a job's output file, with the suffix of its compression."""
+    if compression is None:
+        compression = OUTPUT_COMPRESSION
+    if compression == "none":
+        compression = None
+    try:
+        validate_compression(compression)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    return with_compression(output_filename, compression)
+
+def _cache_key(script: str, input_files: List[str], output_filename: str,
+               input_schema: Dict[str, Dict]) -> str:
+    inputs = [
+        {"name": os.path.basename(file_path), "content_hash": file_registry.content_hash_of(file_path)}
+        for file_path in input_files
+    ]
+    schema = {os.path.basename(file_path): hints for file_path, hints in input_schema.items()}
+    return result_cache.key(script, inputs, output_filename, schema)
+
+def _cached_response(job_id: str, cache_key: str, output_filename: str) -> Optional[ScriptExecutionResponse]:
+    """Complete a job straight from the result cache, if the run is cached."""
+    cached = result_cache.get(cache_key)
+    if cached is None:
+        return None
+    
+    output_file = os.path.join(OUTPUT_DIR, f"{job_id}_{output_filename}")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    try:
+        link_or_copy(cached["output_file"], output_file)
+    except OSError:
+        # Evicted by another worker since it was looked up: run the job
+        return None
+    logs = [f"Result served from cache ({cache_key[:12]}); logs of the original run:"] + cached["logs"]
+    job_store.create(job_id, status="completed", logs=logs, output_file=output_file,
+                     finished_at=time.time())
+    return ScriptExecutionResponse(
+        job_id=job_id,
+        status="completed",
+        logs=logs,
+        output_file=output_file,
+        error=None
+    )
+
+def _queue_job(job_id: str, priority: int, func, *args: Any) -> ScriptExecutionResponse:
+    """Record a queued job and submit func(*args) to the job scheduler."""
+    job = job_store.create(job_id, status="queued")
+    try:
+        queue_position = job_scheduler.submit(job_id, func, *args, priority=priority)
+    except QueueFull as e:
+        job_store.delete(job_id)
+        raise HTTPException(
+            status_code=429,
+            detail=str(e)
+        )
+    
+    return ScriptExecutionResponse(
+        job_id=job_id,
+        status=job["status"],
+        logs=[],
+        output_file=None,
+        error=None,
+        queue_position=queue_position
+    )
+
+def _get_job(job_id: str) -> Dict[str, Any]:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found"
+        )
+    return job
+
+def _job_logs(job: Dict[str, Any]) -> List[str]:
+    """Logs of a job; running jobs are read from their log file so any
+    server worker sees them."""
+    if job["status"] == "processing":
+        return JobLog.read(job["job_id"])
+    return job["logs"]
@@ -1,29 +1,43 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 import os
 import uuid
 from datetime import datetime
 from typing import List
 from models.schemas import FileUploadResponse, FileListResponse
+from services.file_registry import file_registry, UPLOAD_DIR
+from services.upload_stream import stream_upload, UploadTooLarge, UploadCorrupt
+from services.compression import is_csv_name, compression_of, available
+from services.dataframe_cache import dataframe_cache
+from services.columnar_store import ColumnarStore
+from services.column_profiler import ColumnProfiler
+from services.csv_analyzer import CSVAnalyzer
+from services.row_index import RowIndex
+from services.downloads import file_response
 
 router = APIRouter(prefix="/api/upload", tags=["upload"])
 
 # Ensure upload directory exists
-UPLOAD_DIR = "backend/uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 @router.post("/files", response_model=List[FileUploadResponse])
-async def upload_files(files: List[UploadFile] = File(...)):
-    """Upload multiple CSV files."""
+async def upload_files(background_tasks: BackgroundTasks, files: List[UploadFile] = File(...)):
+    """Upload multiple CSV files, plain or compressed (.csv.gz, .csv.zst)."""
     uploaded_files = []
     
     for file in files:
         # Validate file extension
-        if not file.filename.lower().endswith('.csv'):
+        if not is_csv_name(file.filename):
             raise HTTPException(
                 status_code=400,
                 detail=f"File {file.filename} is not a CSV file"
             )
+        if not available(compression_of(file.filename)):
+            raise HTTPException(
+                status_code=400,
+                detail=f"File {file.filename} is zstd compressed, which this server cannot read"
+            )
         
         # Generate unique filename
         file_id = str(uuid.uuid4())
@@ -31,22 +45,42 @@ async def upload_files(files: List[UploadFile] = File(...)):
         unique_filename = f"{file_id}_{file.filename}"
         file_path = os.path.join(UPLOAD_DIR, unique_filename)
         
-        # Save file
+        # Stream file to disk
         try:
-            contents = await file.read()
-            with open(file_path, 'wb') as f:
-                f.write(contents)
+            upload = await stream_upload(file, file_path)
+            
+            file_registry.register(
+                file_id,
+                file.filename,
+                file_path,
+                content_hash=upload["content_hash"],
+                row_count=upload["row_count"],
+                columns=upload["columns"]
+            )
+            
+            # Build the columnar sidecar after the response is sent
+            background_tasks.add_task(ingest_file, file_path)
             
             file_info = FileUploadResponse(
                 id=file_id,
                 filename=file.filename,
-                size=len(contents),
+                size=upload["size"],
                 upload_time=datetime.now(),
                 status="uploaded"
             )
             
             uploaded_files.append(file_info)
             
+        except UploadTooLarge as e:
+            raise HTTPException(
+                status_code=413,
+                detail=str(e)
+            )
+        except UploadCorrupt as e:
+            raise HTTPException(
+                status_code=400,
+                detail=str(e)
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=500,
@@ -61,24 +95,16 @@ async def list_files():
     files = []
     
     try:
-        for filename in os.listdir(UPLOAD_DIR):
-            if filename.endswith('.csv'):
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                file_stats = os.stat(file_path)
-                
-                # Extract original filename from stored filename
-                parts = filename.split('_', 1)
-                original_filename = parts[1] if len(parts) > 1 else filename
-                
-                file_info = FileUploadResponse(
-                    id=parts[0],
-                    filename=original_filename,
-                    size=file_stats.st_size,
-                    upload_time=datetime.fromtimestamp(file_stats.st_mtime),
-                    status="uploaded"
-                )
-                
-                files.append(file_info)
+        for entry in file_registry.list():
+            file_info = FileUploadResponse(
+                id=entry["id"],
+                filename=entry["filename"],
+                size=entry["size"],
+                upload_time=datetime.fromtimestamp(entry["mtime"]),
+                status="uploaded"
+            )
+            
+            files.append(file_info)
         
         return FileListResponse(files=files, total_count=len(files))
         
@@ -92,46 +118,65 @@ async def list_files():
 async def delete_file(file_id: str):
     """Delete a specific file."""
     try:
-        for filename in os.listdir(UPLOAD_DIR):
-            if filename.startswith(f"{file_id}_"):
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                os.remove(file_path)
-                return {"message": "File deleted successfully"}
+        entry = file_registry.remove(file_id)
+        if entry:
+            dataframe_cache.invalidate(entry["path"])
+            ColumnarStore.remove(entry["path"])
+            ColumnProfiler.remove(entry["path"])
+            RowIndex.remove(entry["path"])
+            if os.path.exists(entry["path"]):
+                os.remove(entry["path"])
+            return {"message": "File deleted successfully"}
         
         raise HTTPException(
             status_code=404,
             detail="File not found"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error deleting file: {str(e)}"
         )
 
-@router.get("/files/{file_id}/download")
-async def download_file(file_id: str):
-    """Download a specific file."""
+@router.api_route("/files/{file_id}/download", methods=["GET", "HEAD"])
+async def download_file(file_id: str, request: Request):
+    """Download a specific file, resumable with Range and tagged with the
+    content hash recorded at upload; compressed uploads are sent as stored
+    to clients accepting their encoding."""
     try:
-        for filename in os.listdir(UPLOAD_DIR):
-            if filename.startswith(f"{file_id}_"):
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                parts = filename.split('_', 1)
-                original_filename = parts[1] if len(parts) > 1 else filename
-                
-                return FileResponse(
-                    file_path,
-                    media_type='text/csv',
-                    filename=original_filename
-                )
+        entry = file_registry.get(file_id)
+        if entry and os.path.exists(entry["path"]):
+            sha256 = await run_in_threadpool(file_registry.content_hash_of, entry["path"])
+            return file_response(entry["path"], entry["filename"], request.headers, sha256)
         
         raise HTTPException(
             status_code=404,
             detail="File not found"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error downloading file: {str(e)}"
         )
+
+def ingest_file(file_path: str):
+    """Index an uploaded CSV, convert it into its columnar sidecar and profile it."""
+    try:
+        RowIndex.get_or_build(file_path)
+        
+        # Files too large to load whole are only ever streamed
+        if not CSVAnalyzer.fits_in_memory(file_path):
+            return
+        
+        ColumnarStore.convert(file_path)
+        ColumnProfiler.get_or_build(file_path)
+    except Exception:
+        # Readers fall back to parsing the CSV when there is no sidecar or
+        # profile yet
+        pass
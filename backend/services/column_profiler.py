@@ -0,0 +1,187 @@
+import os
+import json
+import math
+import threading
+from typing import Dict, Any, Optional
+import numpy as np
+import pandas as pd
+from services.type_inference import infer_column_type
+
+TOP_K = 10
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+def to_native(value: Any) -> Any:
+    """Convert numpy/pandas scalars into JSON-serializable Python values."""
+    if value is None:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return str(value)
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def semantic_type_of(dtype: str, is_date: bool = False) -> str:
+    """Map a pandas dtype name to integer/float/date/string/boolean."""
+    if dtype == 'int64':
+        return 'integer'
+    elif dtype == 'float64':
+        return 'float'
+    elif dtype == 'object':
+        return 'date' if is_date else 'string'
+    elif dtype == 'bool':
+        return 'boolean'
+    return dtype
+
+
+def looks_like_date(col_data: pd.Series) -> bool:
+    """Return True if every non-null value of an object column is a date in
+    one of the recognized formats."""
+    return infer_column_type(col_data)["type"] == "date"
+
+
+def semantic_type(col_data: pd.Series) -> str:
+    """Classify a column as integer/float/date/string/boolean."""
+    dtype = str(col_data.dtype)
+    return semantic_type_of(dtype, dtype == 'object' and looks_like_date(col_data))
+
+
+class ColumnProfiler:
+    """Per-file column profiles computed once per file version.
+
+    A profile is built from the parsed frame after upload (or on first use)
+    and stored next to the CSV as ``.<csv name>.profile.json``, tagged with
+    the mtime and size of the file it describes. The info and column stats
+    endpoints are answered from it without touching the data again.
+    """
+
+    _memory: Dict[str, Dict[str, Any]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def profile_path(csv_path: str) -> str:
+        directory, name = os.path.split(csv_path)
+        return os.path.join(directory, f".{name}.profile.json")
+
+    @staticmethod
+    def build(df: pd.DataFrame) -> Dict[str, Any]:
+        """Profile every column of a frame."""
+        columns = {}
+        for col in df.columns:
+            columns[str(col)] = ColumnProfiler._profile_column(df[col])
+
+        return {
+            "rows": len(df),
+            "column_names": [str(col) for col in df.columns],
+            "memory_usage": int(df.memory_usage(deep=True).sum()),
+            "columns": columns
+        }
+
+    @staticmethod
+    def _profile_column(col_data: pd.Series) -> Dict[str, Any]:
+        null_count = int(col_data.isnull().sum())
+        counts = col_data.value_counts()
+        inferred = infer_column_type(col_data)
+        dtype = str(col_data.dtype)
+
+        profile = {
+            'dtype': dtype,
+            'semantic_type': semantic_type_of(dtype, inferred["type"] == "date"),
+            'inferred_type': inferred,
+            'count': int(len(col_data) - null_count),
+            'null_count': null_count,
+            'unique_count': int(len(counts)),
+            'top_values': [
+                {'value': to_native(value), 'count': int(count)}
+                for value, count in counts.head(TOP_K).items()
+            ],
+            # value_counts sorts by frequency, so its first and last entries
+            # are the most and least common values.
+            'most_common': to_native(counts.index[0]) if len(counts) > 0 else None,
+            'least_common': to_native(counts.index[-1]) if len(counts) > 0 else None
+        }
+
+        if pd.api.types.is_numeric_dtype(col_data) and not pd.api.types.is_bool_dtype(col_data):
+            quantiles = col_data.quantile(QUANTILES)
+            profile.update({
+                'min': to_native(col_data.min()),
+                'max': to_native(col_data.max()),
+                'mean': to_native(col_data.mean()),
+                'median': to_native(col_data.median()),
+                'std': to_native(col_data.std()),
+                'quantiles': {str(q): to_native(v) for q, v in quantiles.items()}
+            })
+
+        return profile
+
+    @staticmethod
+    def load(csv_path: str) -> Optional[Dict[str, Any]]:
+        """Return the stored profile if it matches the current file version."""
+        file_stats = os.stat(csv_path)
+        version = [file_stats.st_mtime, file_stats.st_size]
+
+        with ColumnProfiler._lock:
+            profile = ColumnProfiler._memory.get(csv_path)
+        if profile is not None and profile["version"] == version:
+            return profile
+
+        try:
+            with open(ColumnProfiler.profile_path(csv_path), 'r') as f:
+                profile = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if profile.get("version") != version:
+            return None
+
+        with ColumnProfiler._lock:
+            ColumnProfiler._memory[csv_path] = profile
+        return profile
+
+    @staticmethod
+    def save(csv_path: str, profile: Dict[str, Any], version: list) -> Dict[str, Any]:
+        """Persist a profile for the given file version."""
+        profile = dict(profile, version=version)
+        path = ColumnProfiler.profile_path(csv_path)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(profile, f)
+        os.replace(tmp_path, path)
+
+        with ColumnProfiler._lock:
+            ColumnProfiler._memory[csv_path] = profile
+        return profile
+
+    @staticmethod
+    def get_or_build(csv_path: str, df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """Return the current profile, building and storing it if needed."""
+        profile = ColumnProfiler.load(csv_path)
+        if profile is not None:
+            return profile
+
+        file_stats = os.stat(csv_path)
+        version = [file_stats.st_mtime, file_stats.st_size]
+        if df is None:
+            from services.csv_analyzer import CSVAnalyzer
+            df = CSVAnalyzer.load_dataframe(csv_path)
+            # In compact mode loading profiles the frame as read, before
+            # its dtypes change
+            profile = ColumnProfiler.load(csv_path)
+            if profile is not None:
+                return profile
+        return ColumnProfiler.save(csv_path, ColumnProfiler.build(df), version)
+
+    @staticmethod
+    def remove(csv_path: str) -> None:
+        """Delete the stored profile of a CSV file."""
+        with ColumnProfiler._lock:
+            ColumnProfiler._memory.pop(csv_path, None)
+        path = ColumnProfiler.profile_path(csv_path)
+        if os.path.exists(path):
+            os.remove(path)
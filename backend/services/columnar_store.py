@@ -0,0 +1,91 @@
+import os
+from typing import Iterator, List, Optional
+import pandas as pd
+from services.csv_engines import read_csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - sidecars are an optimization only
+    pa = None
+    feather = None
+
+
+class ColumnarStore:
+    """Typed Arrow IPC sidecars for uploaded CSV files.
+
+    Each CSV is converted once after upload into an uncompressed Arrow IPC
+    file stored next to it as ``.<csv name>.arrow``. Re-reads memory-map the
+    sidecar and only materialize the requested columns instead of parsing the
+    CSV text again. The original CSV stays the download artifact.
+    """
+
+    @staticmethod
+    def available() -> bool:
+        return feather is not None
+
+    @staticmethod
+    def sidecar_path(csv_path: str) -> str:
+        """Return the sidecar location for a CSV file."""
+        directory, name = os.path.split(csv_path)
+        return os.path.join(directory, f".{name}.arrow")
+
+    @staticmethod
+    def fresh_sidecar(csv_path: str) -> Optional[str]:
+        """Return the sidecar path if it exists and is newer than the CSV."""
+        if not ColumnarStore.available():
+            return None
+        sidecar = ColumnarStore.sidecar_path(csv_path)
+        try:
+            if os.stat(sidecar).st_mtime >= os.stat(csv_path).st_mtime:
+                return sidecar
+        except FileNotFoundError:
+            pass
+        return None
+
+    @staticmethod
+    def convert(csv_path: str) -> Optional[str]:
+        """Convert a CSV file into its sidecar and return the sidecar path."""
+        if not ColumnarStore.available():
+            return None
+
+        sidecar = ColumnarStore.sidecar_path(csv_path)
+        tmp_path = sidecar + ".tmp"
+        try:
+            # Parse into pandas so the sidecar carries exactly the dtypes the
+            # CSV path would infer.
+            df = read_csv(csv_path)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            feather.write_feather(table, tmp_path, compression='uncompressed')
+            os.replace(tmp_path, sidecar)
+            return sidecar
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def load(csv_path: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Load a CSV's data from its sidecar, or return None if there is none."""
+        sidecar = ColumnarStore.fresh_sidecar(csv_path)
+        if sidecar is None:
+            return None
+        table = feather.read_table(sidecar, columns=columns, memory_map=True)
+        return table.to_pandas()
+
+    @staticmethod
+    def iter_batches(csv_path: str, columns: Optional[List[str]] = None,
+                     batch_rows: int = 100_000) -> Optional[Iterator[pd.DataFrame]]:
+        """Iterate over a CSV's sidecar data in DataFrames of at most
+        batch_rows rows, or return None if there is no sidecar."""
+        sidecar = ColumnarStore.fresh_sidecar(csv_path)
+        if sidecar is None:
+            return None
+        table = feather.read_table(sidecar, columns=columns, memory_map=True)
+        return (batch.to_pandas() for batch in table.to_batches(max_chunksize=batch_rows))
+
+    @staticmethod
+    def remove(csv_path: str) -> None:
+        """Delete the sidecar of a CSV file if present."""
+        sidecar = ColumnarStore.sidecar_path(csv_path)
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
@@ -0,0 +1,54 @@
+import os
+from typing import Dict, Any, Optional
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover - text then stays object
+    pyarrow = None
+
+# Load frames with the compact dtypes planned from each file's profile:
+# the smallest integer types that hold the values, nullable integers for
+# integral columns with missing values, categoricals for low-cardinality
+# text and Arrow-backed strings for other text. Floats are kept as they are.
+COMPACT_LOAD = os.getenv("COMPACT_LOAD", "0") == "1"
+
+_SIGNED = [("int8", "Int8"), ("int16", "Int16"), ("int32", "Int32")]
+
+
+def compact_dtype_plan(profile: Dict[str, Any]) -> Dict[str, str]:
+    """Map the columns of a profiled file to lossless compact dtypes.
+
+    Columns missing from the plan keep the dtype a default read gives them.
+    """
+    plan = {}
+    for col, info in profile["columns"].items():
+        inferred = info.get("inferred_type") or {}
+        kind = inferred.get("type")
+        dtype = info["dtype"]
+        if kind == "integer" and dtype in ("int64", "float64") and info.get("min") is not None:
+            smallest = _smallest_int(info["min"], info["max"], nullable=dtype == "float64")
+            if smallest:
+                plan[col] = smallest
+        elif dtype == "object" and kind == "boolean" and inferred.get("nullable"):
+            plan[col] = "boolean"
+        elif dtype == "object" and kind == "category":
+            plan[col] = "category"
+        elif dtype == "object" and kind in ("string", "date", "boolean") and pyarrow is not None:
+            plan[col] = "string[pyarrow]"
+    return plan
+
+
+def apply_compact_dtypes(df: pd.DataFrame, plan: Optional[Dict[str, str]]) -> pd.DataFrame:
+    """Cast the planned columns of a frame; a new frame is returned."""
+    plan = {col: dtype for col, dtype in (plan or {}).items() if col in df.columns}
+    return df.astype(plan) if plan else df
+
+
+def _smallest_int(low: float, high: float, nullable: bool) -> Optional[str]:
+    for numpy_dtype, nullable_dtype in _SIGNED:
+        limits = np.iinfo(numpy_dtype)
+        if limits.min <= low and high <= limits.max:
+            return nullable_dtype if nullable else numpy_dtype
+    return None
@@ -0,0 +1,234 @@
+import io
+import os
+import gzip
+import zlib
+import shutil
+from typing import Callable, Optional
+
+try:
+    import zstandard
+    _DECODE_ERRORS = (zlib.error, zstandard.ZstdError)
+except ImportError:  # pragma: no cover - .csv.zst files are then rejected
+    zstandard = None
+    _DECODE_ERRORS = (zlib.error,)
+
+# Compressed CSVs are recognized by the suffix after ".csv"; pandas and
+# pyarrow infer the same compression from the file name
+COMPRESSIONS = {".gz": "gzip", ".zst": "zstd"}
+SUFFIXES = {compression: suffix for suffix, compression in COMPRESSIONS.items()}
+CSV_SUFFIXES = (".csv",) + tuple(f".csv{suffix}" for suffix in COMPRESSIONS)
+# Compression of job outputs whose request does not choose one: "gzip",
+# "zstd" or empty for plain CSV
+OUTPUT_COMPRESSION = os.getenv("OUTPUT_COMPRESSION", "")
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", 3))
+
+
+def compression_of(path: str) -> Optional[str]:
+    """Compression of a file as told by its name, or None for plain files."""
+    return COMPRESSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def is_csv_name(filename: str) -> bool:
+    """Whether a file name is that of a plain or compressed CSV."""
+    return filename.lower().endswith(CSV_SUFFIXES)
+
+
+def available(compression: Optional[str]) -> bool:
+    """Whether files of a compression can be read and written here."""
+    return compression != "zstd" or zstandard is not None
+
+
+def validate(compression: Optional[str]) -> None:
+    """Raise ValueError for a compression that cannot be written here."""
+    if compression and compression not in SUFFIXES:
+        raise ValueError(f"Compression must be one of {', '.join(sorted(SUFFIXES))}")
+    if not available(compression):
+        raise ValueError("zstd compression needs the zstandard package")
+
+
+def with_compression(filename: str, compression: Optional[str]) -> str:
+    """The file name of filename written with compression."""
+    if not compression or compression_of(filename) == compression:
+        return filename
+    return without_compression(filename) + SUFFIXES[compression]
+
+
+def without_compression(filename: str) -> str:
+    """The file name of the decompressed content of filename."""
+    if compression_of(filename):
+        return os.path.splitext(filename)[0]
+    return filename
+
+
+def open_csv(path: str, mode: str = 'rb', compression: Optional[str] = "infer"):
+    """Open a plain or compressed file, decompressing or compressing on the
+    fly; modes are those of open(), text modes use UTF-8.
+
+    Compressed streams only seek forward, by decoding what they skip.
+    """
+    if compression == "infer":
+        compression = compression_of(path)
+    text = 'b' not in mode
+    binary_mode = mode.replace('t', '').replace('b', '') + 'b'
+
+    if compression is None:
+        return open(path, mode, newline='' if text else None)
+    if compression == "gzip":
+        stream = gzip.open(path, binary_mode, compresslevel=GZIP_LEVEL)
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+        raw = open(path, binary_mode)
+        if 'r' in binary_mode:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=True)
+    else:
+        raise ValueError(f"Unknown compression: {compression}")
+    return io.TextIOWrapper(stream, encoding='utf-8', newline='') if text else stream
+
+
+def compress_file(source: str, target: str, compression: Optional[str]) -> None:
+    """Write the content of a plain file to target with compression."""
+    with open(source, 'rb') as src, open_csv(target, 'wb', compression) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+class Decompressor:
+    """Incrementally decompress a file fed chunk by chunk.
+
+    Decoded data is handed to sink in pieces of at most piece_size bytes as
+    it is produced, so memory stays bounded however far a chunk expands.
+    Concatenated gzip members and zstd frames decode as one stream, as the
+    command line tools do.
+    """
+
+    def __init__(self, compression: Optional[str], sink: Callable[[bytes], None],
+                 piece_size: int = 1024 * 1024):
+        if not available(compression):
+            raise ValueError("zstd compression needs the zstandard package")
+        self.compression = compression
+        self.sink = sink
+        self.piece_size = piece_size
+        self._pending = False
+        if compression == "gzip":
+            self._decoder = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        elif compression == "zstd":
+            self._decoder = zstandard.ZstdDecompressor().stream_writer(
+                _SinkWriter(sink), write_size=piece_size
+            )
+            self._frames = _ZstdFrames()
+
+    def feed(self, chunk: bytes) -> None:
+        """Decode chunk; raises ValueError on data that is not validly
+        compressed. Exceptions raised by sink propagate."""
+        try:
+            if self.compression == "gzip":
+                self._feed_gzip(chunk)
+            elif self.compression == "zstd":
+                self._frames.feed(chunk)
+                self._decoder.write(chunk)
+            else:
+                self.sink(chunk)
+        except _DECODE_ERRORS as e:
+            raise ValueError(f"Invalid {self.compression} data: {e}")
+
+    def _feed_gzip(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        while True:
+            data = self._decoder.decompress(chunk, self.piece_size)
+            if data:
+                self.sink(data)
+            if self._decoder.eof:
+                # The next member starts in the unused data
+                chunk = self._decoder.unused_data
+                self._decoder = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+                self._pending = False
+                if not chunk:
+                    return
+            else:
+                self._pending = True
+                # A full piece may leave output to drain without more input
+                chunk = self._decoder.unconsumed_tail
+                if not chunk and len(data) < self.piece_size:
+                    return
+
+    def finish(self) -> None:
+        """Raise ValueError if the data ended within a member or frame."""
+        if self.compression == "zstd":
+            self._decoder.flush()
+            truncated = not self._frames.complete
+        else:
+            truncated = self._pending
+        if truncated:
+            raise ValueError("Compressed data is truncated")
+
+
+class _SinkWriter:
+    """File-like adapter handing what a zstd stream writer decodes to a sink."""
+
+    def __init__(self, sink: Callable[[bytes], None]):
+        self.sink = sink
+
+    def write(self, data: bytes) -> int:
+        self.sink(bytes(data))
+        return len(data)
+
+
+class _ZstdFrames:
+    """Follows the frame and block structure of zstd data fed piece by piece,
+    without decoding it, to tell whether the data ends between frames."""
+
+    _MAGIC = 0xFD2FB528
+
+    def __init__(self):
+        self._state = "magic"
+        self._head = b''
+        self._skip = 0
+        self._checksum = False
+
+    @property
+    def complete(self) -> bool:
+        return self._state == "magic" and not self._head and not self._skip
+
+    def feed(self, data: bytes) -> None:
+        position = 0
+        while position < len(data):
+            if self._skip:
+                skipped = min(self._skip, len(data) - position)
+                position += skipped
+                self._skip -= skipped
+                continue
+            needed = {"magic": 4, "skippable": 4, "descriptor": 1, "block": 3}[self._state]
+            taken = data[position:position + needed - len(self._head)]
+            self._head += taken
+            position += len(taken)
+            if len(self._head) == needed:
+                head, self._head = self._head, b''
+                self._advance(int.from_bytes(head, "little"))
+
+    def _advance(self, value: int) -> None:
+        if self._state == "magic":
+            if value == self._MAGIC:
+                self._state = "descriptor"
+            elif value & 0xFFFFFFF0 == 0x184D2A50:
+                self._state = "skippable"
+            else:
+                raise ValueError(f"Invalid zstd data: unknown frame magic {value:#x}")
+        elif self._state == "skippable":
+            self._skip, self._state = value, "magic"
+        elif self._state == "descriptor":
+            single_segment = value >> 5 & 1
+            self._checksum = bool(value >> 2 & 1)
+            content_size_bytes = [single_segment, 2, 4, 8][value >> 6]
+            # Window descriptor, dictionary id and content size follow
+            self._skip = (1 - single_segment) + [0, 1, 2, 4][value & 3] + content_size_bytes
+            self._state = "block"
+        else:
+            last, kind, size = value & 1, value >> 1 & 3, value >> 3
+            self._skip = 1 if kind == 1 else size
+            if last:
+                self._skip += 4 if self._checksum else 0
+                self._state = "magic"
@@ -1,51 +1,200 @@
 import pandas as pd
+import io
 import os
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, List, Any, Iterator, Optional, Tuple
 from models.schemas import CSVInfo, CSVPreview
+from services.dataframe_cache import dataframe_cache
+from services.columnar_store import ColumnarStore
+from services.column_profiler import ColumnProfiler, QUANTILES, semantic_type_of, to_native
+from services.type_inference import infer_column_type
+from services.compact_dtypes import COMPACT_LOAD, compact_dtype_plan, apply_compact_dtypes
+from services.sketches import ColumnSketch
+from services.row_index import RowIndex
+from services.csv_engines import read_csv
+from services.compression import open_csv
+
+# Rows per chunk when streaming over a file instead of loading it whole
+CHUNK_ROWS = int(os.getenv("ANALYZER_CHUNK_ROWS", 100_000))
+
+# Files whose parsed frame would take more than this many bytes are never
+# loaded whole by the analyzer; 0 derives the limit from the memory available
+# at the time, of which ANALYZER_MEMORY_FRACTION may go to one frame (the
+# rest leaves room for the peak of parsing and other requests)
+IN_MEMORY_LIMIT = int(os.getenv("ANALYZER_IN_MEMORY_LIMIT", 0))
+MEMORY_FRACTION = float(os.getenv("ANALYZER_MEMORY_FRACTION", 0.25))
+# Limit used when the available memory cannot be read
+FALLBACK_MEMORY_LIMIT = 1024**3
+# Bytes of CSV text parsed to estimate how much a file grows once loaded
+FRAME_SAMPLE_BYTES = 1024**2
+
+
+class TooLargeToLoad(Exception):
+    """Raised when an answer needs the whole file in memory but its frame
+    would not fit (see CSVAnalyzer.fits_in_memory)."""
+
+
+def available_memory() -> Optional[int]:
+    """Bytes of memory available to new allocations, or None if unknown."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def memory_limit() -> int:
+    """Largest frame, in bytes, the analyzer loads whole."""
+    if IN_MEMORY_LIMIT:
+        return IN_MEMORY_LIMIT
+    available = available_memory()
+    return int(available * MEMORY_FRACTION) if available else FALLBACK_MEMORY_LIMIT
+
+
+@lru_cache(maxsize=1024)
+def _expansion(file_path: str, mtime: float, size: int) -> float:
+    """Bytes of loaded frame per byte of CSV text, from the head of a file
+    version."""
+    with open_csv(file_path, 'rb') as f:
+        head = f.read(FRAME_SAMPLE_BYTES + 1)
+    if len(head) > FRAME_SAMPLE_BYTES:
+        # Whole rows only
+        head = head[:head.rfind(b'\n', 0, FRAME_SAMPLE_BYTES) + 1]
+    if not head:
+        return 1.0
+    sample = pd.read_csv(io.BytesIO(head))
+    return max(int(sample.memory_usage(deep=True).sum()) / len(head), 1.0)
+
+
+def _merge_dtypes(current: Optional[str], dtype: str) -> str:
+    """Combine the dtypes pandas inferred for two chunks of one column."""
+    if current is None or current == dtype:
+        return dtype
+    if {current, dtype} <= {'int64', 'float64'}:
+        return 'float64'
+    return 'object'
+
+
+def _merge_inferred(current: Optional[Dict[str, Any]], inferred: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine the types inferred for two chunks of one column."""
+    if current is None or current == inferred:
+        return inferred
+    kinds = {current["type"], inferred["type"]}
+    if kinds <= {"integer", "float"}:
+        if "float" in kinds:
+            return {"type": "float"}
+        return {"type": "integer", "nullable": True}
+    if "mixed" in kinds:
+        return {"type": "mixed"}
+    return {"type": "string"}
+
+
+def _object_memory(col_data: pd.Series) -> int:
+    """Estimate deep memory of a non-object column once boxed as Python objects."""
+    if col_data.dtype == bool:
+        # sys.getsizeof(True) == 28, sys.getsizeof(False) == 24
+        true_count = int(col_data.sum())
+        return len(col_data) * 8 + true_count * 28 + (len(col_data) - true_count) * 24
+    # Pointer plus a boxed float (24 bytes) or small int (28 bytes)
+    box = 24 if col_data.dtype.kind == 'f' else 28
+    return len(col_data) * (8 + box)
 
 class CSVAnalyzer:
+    @staticmethod
+    def load_dataframe(file_path: str, columns: Optional[List[str]] = None,
+                       engine: Optional[str] = None) -> pd.DataFrame:
+        """Load a CSV file through the shared DataFrame cache.
+
+        When only some columns are needed and the full frame is not cached,
+        just those are read, from the columnar sidecar if there is one, and
+        the partial frame is not cached. Files without a sidecar are parsed
+        with engine (see services.csv_engines), which defaults to
+        CSV_ENGINE. The returned frame may be shared with other requests; do
+        not mutate it.
+        """
+        if columns is not None:
+            df = dataframe_cache.peek(file_path)
+            if df is not None:
+                return df[columns]
+            df = ColumnarStore.load(file_path, columns=columns)
+            if df is None:
+                df = read_csv(file_path, columns=columns, engine=engine)
+                if list(df.columns) != list(columns):
+                    # usecols keeps the file's column order
+                    df = df[columns]
+            return apply_compact_dtypes(df, CSVAnalyzer.compact_plan(file_path)) if COMPACT_LOAD else df
+        return dataframe_cache.get(file_path, lambda path: CSVAnalyzer._read_full(path, engine))
+    
+    @staticmethod
+    def _read_full(file_path: str, engine: Optional[str] = None) -> pd.DataFrame:
+        df = ColumnarStore.load(file_path)
+        if df is None:
+            df = read_csv(file_path, engine=engine)
+        if COMPACT_LOAD:
+            df = CSVAnalyzer._compact(file_path, df)
+        return df
+    
+    @staticmethod
+    def _compact(file_path: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Cast a freshly read frame to its compact dtypes.
+
+        The profile the plan comes from is built from the frame as read, and
+        the memory of the compact frame is recorded in it next to the
+        default memory_usage.
+        """
+        profile = ColumnProfiler.get_or_build(file_path, df)
+        compact = apply_compact_dtypes(df, compact_dtype_plan(profile))
+        if "compact_memory_usage" not in profile:
+            profile = dict(profile, compact_memory_usage=int(compact.memory_usage(deep=True).sum()))
+            ColumnProfiler.save(file_path, profile, profile["version"])
+        return compact
+    
+    @staticmethod
+    def compact_plan(file_path: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, str]]:
+        """Compact dtypes for the columns of a profiled file, or None if it
+        has not been profiled."""
+        profile = ColumnProfiler.load(file_path)
+        if profile is None:
+            return None
+        plan = compact_dtype_plan(profile)
+        return {col: dtype for col, dtype in plan.items() if columns is None or col in columns}
+    
     @staticmethod
     def analyze_csv(file_path: str) -> CSVInfo:
         """Analyze CSV file and return detailed information."""
         try:
-            df = pd.read_csv(file_path)
-            
             # Get file size
             file_size = os.path.getsize(file_path)
             
-            # Analyze data types
-            data_types = {}
-            for col in df.columns:
-                dtype = str(df[col].dtype)
-                if dtype == 'int64':
-                    data_types[col] = 'integer'
-                elif dtype == 'float64':
-                    data_types[col] = 'float'
-                elif dtype == 'object':
-                    if df[col].str.match(r'\d{4}-\d{2}-\d{2}').all():
-                        data_types[col] = 'date'
-                    else:
-                        data_types[col] = 'string'
-                elif dtype == 'bool':
-                    data_types[col] = 'boolean'
-                else:
-                    data_types[col] = dtype
-            
-            # Count missing values
-            missing_values = df.isnull().sum().to_dict()
-            
-            # Memory usage
-            memory_usage = f"{df.memory_usage(deep=True).sum() / 1024**2:.2f} MB"
+            profile = CSVAnalyzer.get_profile(file_path)
+            columns = profile["columns"]
+            
+            # Data types and missing values
+            data_types = {col: columns[col]["semantic_type"] for col in profile["column_names"]}
+            missing_values = {col: columns[col]["null_count"] for col in profile["column_names"]}
+            
+            # Memory usage, and in compact mode that of the loaded frame
+            memory_usage = f"{profile['memory_usage'] / 1024**2:.2f} MB"
+            compact_memory_usage = None
+            if profile.get("compact_memory_usage") is not None:
+                compact_memory_usage = f"{profile['compact_memory_usage'] / 1024**2:.2f} MB"
             file_size_str = f"{file_size / 1024:.2f} KB" if file_size < 1024*1024 else f"{file_size / 1024**2:.2f} MB"
             
             return CSVInfo(
                 filename=os.path.basename(file_path),
-                rows=len(df),
-                columns=len(df.columns),
-                column_names=list(df.columns),
+                rows=profile["rows"],
+                columns=len(profile["column_names"]),
+                column_names=profile["column_names"],
                 data_types=data_types,
                 missing_values=missing_values,
                 memory_usage=memory_usage,
+                compact_memory_usage=compact_memory_usage,
                 file_size=file_size_str
             )
             
@@ -53,56 +202,281 @@ class CSVAnalyzer:
             raise Exception(f"Error analyzing CSV: {str(e)}")
     
     @staticmethod
-    def get_preview(file_path: str, max_rows: int = 100) -> CSVPreview:
-        """Get a preview of the CSV file."""
+    def estimate_frame_size(file_path: str) -> int:
+        """Estimated deep memory of a file loaded whole, extrapolated from
+        its head."""
+        file_stats = os.stat(file_path)
+        expansion = _expansion(file_path, file_stats.st_mtime, file_stats.st_size)
+        return int(RowIndex.data_size(file_path) * expansion)
+    
+    @staticmethod
+    def fits_in_memory(file_path: str) -> bool:
+        """Whether a file may be loaded whole: its estimated frame must fit
+        in memory_limit()."""
+        return CSVAnalyzer.estimate_frame_size(file_path) <= memory_limit()
+    
+    @staticmethod
+    def get_profile(file_path: str) -> Dict[str, Any]:
+        """The stored profile of a file, building it if needed.
+
+        Files that do not fit in memory are summarized chunk by chunk; the
+        summary is stored as their profile, marked ``streamed``, and lacks
+        the per-column statistics of a full profile.
+        """
+        profile = ColumnProfiler.load(file_path)
+        if profile is not None:
+            return profile
+        if not CSVAnalyzer.fits_in_memory(file_path):
+            file_stats = os.stat(file_path)
+            summary = dict(CSVAnalyzer.summarize_streaming(file_path), streamed=True)
+            return ColumnProfiler.save(file_path, summary, [file_stats.st_mtime, file_stats.st_size])
+        return ColumnProfiler.get_or_build(file_path)
+    
+    @staticmethod
+    def get_columns(file_path: str) -> Dict[str, Any]:
+        """Column names and the dtypes load_dataframe gives them, from the
+        file's profile."""
+        profile = CSVAnalyzer.get_profile(file_path)
+        dtypes = {col: profile["columns"][col]["dtype"] for col in profile["column_names"]}
+        if COMPACT_LOAD:
+            dtypes.update(compact_dtype_plan(profile))
+        return {"columns": profile["column_names"], "dtypes": dtypes}
+    
+    @staticmethod
+    def summarize_streaming(file_path: str, chunk_rows: int = CHUNK_ROWS) -> Dict[str, Any]:
+        """Summarize a CSV file chunk by chunk in bounded memory.
+
+        Returns the row count, column names, deep memory usage and per-column
+        dtype, semantic type and null count, matching what a full read would
+        infer. Peak memory depends on chunk_rows, not on the file size.
+        """
+        rows = 0
+        column_names = None
+        state = {}
+        
+        for chunk in pd.read_csv(file_path, chunksize=chunk_rows):
+            if column_names is None:
+                column_names = [str(col) for col in chunk.columns]
+                state = {
+                    col: {"dtype": None, "has_nulls": False, "inferred": None,
+                          "null_count": 0, "memory": 0, "object_memory": 0}
+                    for col in column_names
+                }
+            
+            rows += len(chunk)
+            
+            for col, raw_col in zip(column_names, chunk.columns):
+                col_data = chunk[raw_col]
+                col_state = state[col]
+                null_count = int(col_data.isnull().sum())
+                col_state["null_count"] += null_count
+                
+                # Track memory both as parsed and as it would be if the column
+                # ends up as object dtype in a full read.
+                memory = int(col_data.memory_usage(deep=True, index=False))
+                col_state["memory"] += memory
+                col_state["object_memory"] += memory if col_data.dtype == object else _object_memory(col_data)
+                if null_count:
+                    col_state["has_nulls"] = True
+                if null_count == len(col_data):
+                    # An all-null chunk says nothing about the column's type
+                    continue
+                
+                col_state["dtype"] = _merge_dtypes(col_state["dtype"], str(col_data.dtype))
+                col_state["inferred"] = _merge_inferred(col_state["inferred"], infer_column_type(col_data))
+        
+        if column_names is None:
+            column_names = [str(col) for col in pd.read_csv(file_path, nrows=0).columns]
+        
+        columns = {}
+        memory = 0
+        for col in column_names:
+            col_state = state.get(col, {"dtype": None, "has_nulls": True, "inferred": None,
+                                        "null_count": 0, "memory": 0, "object_memory": 0})
+            dtype = col_state["dtype"]
+            # Missing values force ints to float and bools to object
+            if dtype is None:
+                dtype = 'float64' if rows else 'object'
+            elif dtype == 'int64' and col_state["has_nulls"]:
+                dtype = 'float64'
+            elif dtype == 'bool' and col_state["has_nulls"]:
+                dtype = 'object'
+            
+            inferred = col_state["inferred"] or {"type": "float" if dtype == 'float64' else "string"}
+            if dtype == 'float64' and inferred["type"] == "integer":
+                inferred = dict(inferred, nullable=True)
+            
+            memory += col_state["object_memory"] if dtype == 'object' else col_state["memory"]
+            columns[col] = {
+                "dtype": dtype,
+                "semantic_type": semantic_type_of(dtype, inferred["type"] == "date"),
+                "inferred_type": inferred,
+                "null_count": col_state["null_count"]
+            }
+        
+        return {
+            "rows": rows,
+            "column_names": column_names,
+            "memory_usage": memory + int(pd.RangeIndex(rows).memory_usage()),
+            "columns": columns
+        }
+    
+    @staticmethod
+    def get_preview(file_path: str, max_rows: int = 100, offset: int = 0) -> CSVPreview:
+        """Get a page of rows from the CSV file.
+
+        Only the requested rows are parsed. The first page is read straight
+        from the head of the file; later pages seek through the row index.
+        """
         try:
-            df = pd.read_csv(file_path)
+            dtype = CSVAnalyzer.profiled_dtypes(file_path)
+            
+            if offset == 0:
+                preview_df = pd.read_csv(file_path, nrows=max_rows, dtype=dtype)
+            else:
+                preview_df = RowIndex.read_rows(file_path, offset, max_rows, dtype=dtype)
             
-            # Limit to max_rows for preview
-            preview_df = df.head(max_rows)
+            total_rows, exact = CSVAnalyzer.count_rows(file_path)
             
             return CSVPreview(
                 headers=list(preview_df.columns),
                 rows=preview_df.values.tolist(),
-                total_rows=len(df),
-                preview_rows=len(preview_df)
+                total_rows=total_rows,
+                total_rows_estimated=not exact,
+                preview_rows=len(preview_df),
+                offset=offset
             )
             
         except Exception as e:
             raise Exception(f"Error getting CSV preview: {str(e)}")
     
+    @staticmethod
+    def iter_preview(file_path: str, max_rows: int = 100, chunk_rows: int = 1000) -> Iterator[List[Any]]:
+        """Yield the first max_rows rows of the CSV file as lists, chunk by chunk."""
+        dtype = CSVAnalyzer.profiled_dtypes(file_path)
+        for chunk in pd.read_csv(file_path, nrows=max_rows, dtype=dtype, chunksize=chunk_rows):
+            for row in chunk.itertuples(index=False, name=None):
+                yield [to_native(value) for value in row]
+    
+    @staticmethod
+    def count_rows(file_path: str) -> Tuple[int, bool]:
+        """Return (rows, exact) without parsing the file.
+
+        The count is exact when the file has a row index or profile; otherwise
+        it is estimated from the head of the file.
+        """
+        index = RowIndex.load(file_path)
+        if index is not None:
+            return index["rows"], True
+        profile = ColumnProfiler.load(file_path)
+        if profile is not None:
+            return profile["rows"], True
+        return RowIndex.estimate_rows(file_path)
+    
+    @staticmethod
+    def profiled_dtypes(file_path: str) -> Optional[Dict[str, str]]:
+        """Dtypes a full read infers, when the file has been profiled.
+
+        Partial and chunked reads use them to parse like a full read.
+        """
+        profile = ColumnProfiler.load(file_path)
+        if profile is None:
+            return None
+        return {col: info["dtype"] for col, info in profile["columns"].items()}
+    
+    @staticmethod
+    def read_hints(file_path: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """read_csv arguments for the types inferred when the file was
+        profiled, or None if it has not been.
+
+        Dates of a known format get parse_dates with it, integers with
+        missing values the nullable Int64 dtype and low-cardinality text
+        the category dtype.
+        """
+        profile = ColumnProfiler.load(file_path)
+        if profile is None:
+            return None
+        
+        dtype, parse_dates, date_format = {}, [], {}
+        for col, info in profile["columns"].items():
+            if columns is not None and col not in columns:
+                continue
+            inferred = info.get("inferred_type") or {}
+            if inferred.get("type") == "date" and inferred.get("format"):
+                # Dates whose day and month order is unknown stay text
+                parse_dates.append(col)
+                date_format[col] = inferred["format"]
+            elif inferred.get("type") == "integer" and inferred.get("nullable"):
+                dtype[col] = "Int64"
+            elif inferred.get("type") == "category":
+                dtype[col] = "category"
+        return {"dtype": dtype, "parse_dates": parse_dates, "date_format": date_format}
+    
     @staticmethod
     def get_column_stats(file_path: str, column: str) -> Dict[str, Any]:
-        """Get statistics for a specific column."""
+        """Get statistics for a specific column.
+
+        Raises TooLargeToLoad for files that do not fit in memory and have
+        no full profile; use get_column_stats_approx for those.
+        """
         try:
-            df = pd.read_csv(file_path)
+            profile = ColumnProfiler.load(file_path)
+            if profile is None and CSVAnalyzer.fits_in_memory(file_path):
+                profile = ColumnProfiler.get_or_build(file_path)
+            if profile is None or profile.get("streamed"):
+                raise TooLargeToLoad("File is too large for exact column stats; use mode=approx")
             
-            if column not in df.columns:
+            if column not in profile["columns"]:
                 raise ValueError(f"Column '{column}' not found")
             
-            col_data = df[column]
+            col_profile = profile["columns"][column]
             stats = {
                 'column': column,
-                'dtype': str(col_data.dtype),
-                'null_count': col_data.isnull().sum(),
-                'unique_count': col_data.nunique()
+                'dtype': col_profile['dtype'],
+                'semantic_type': col_profile['semantic_type'],
+                'count': col_profile['count'],
+                'null_count': col_profile['null_count'],
+                'unique_count': col_profile['unique_count'],
+                'top_values': col_profile['top_values'],
+                'inferred_type': col_profile.get('inferred_type')
             }
             
-            if pd.api.types.is_numeric_dtype(col_data):
-                stats.update({
-                    'min': col_data.min(),
-                    'max': col_data.max(),
-                    'mean': col_data.mean(),
-                    'median': col_data.median(),
-                    'std': col_data.std()
-                })
-            elif pd.api.types.is_object_dtype(col_data):
+            if 'mean' in col_profile:
+                for key in ('min', 'max', 'mean', 'median', 'std', 'quantiles'):
+                    stats[key] = col_profile[key]
+            else:
                 stats.update({
-                    'most_common': col_data.mode().iloc[0] if not col_data.mode().empty else None,
-                    'least_common': col_data.value_counts().index[-1] if len(col_data.value_counts()) > 0 else None
+                    'most_common': col_profile['most_common'],
+                    'least_common': col_profile['least_common']
                 })
             
             return stats
             
+        except TooLargeToLoad:
+            raise
         except Exception as e:
             raise Exception(f"Error getting column stats: {str(e)}")
+    
+    @staticmethod
+    def get_column_stats_approx(file_path: str, column: str, error: float = 0.01) -> Dict[str, Any]:
+        """Get sketch-based statistics for a column in one streaming pass.
+
+        Memory is bounded by CHUNK_ROWS and the sketch sizes, so this works on
+        files far larger than RAM. The response reports its error bounds.
+        """
+        try:
+            if not 0 < error < 1:
+                raise ValueError("error must be between 0 and 1")
+            
+            header = pd.read_csv(file_path, nrows=0)
+            if column not in header.columns:
+                raise ValueError(f"Column '{column}' not found")
+            
+            sketch = ColumnSketch(error)
+            for chunk in pd.read_csv(file_path, usecols=[column], chunksize=CHUNK_ROWS):
+                sketch.update(chunk[column])
+            
+            return sketch.result(column, QUANTILES)
+            
+        except Exception as e:
+            raise Exception(f"Error getting approximate column stats: {str(e)}")
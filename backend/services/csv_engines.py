@@ -0,0 +1,191 @@
+import io
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional
+import pandas as pd
+from services.compression import compression_of
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover - the pyarrow engine falls back to c
+    pyarrow = None
+
+# Engine of full CSV reads: "c" (pandas, single-threaded), "pyarrow"
+# (multi-threaded Arrow reader) or "parallel" (byte blocks parsed by pandas
+# in a process pool). Chunked and partial reads always use the c engine, and
+# compressed files, which cannot be cut into blocks, the c engine instead of
+# the parallel one.
+CSV_ENGINE = os.getenv("CSV_ENGINE", "c")
+CSV_PARSE_WORKERS = int(os.getenv("CSV_PARSE_WORKERS", 0)) or os.cpu_count() or 1
+# Smaller files are not worth splitting for the parallel engine
+CSV_PARALLEL_MIN_BYTES = int(os.getenv("CSV_PARALLEL_MIN_BYTES", 64 * 1024**2))
+
+ENGINES = ("c", "pyarrow", "parallel")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def read_csv(file_path: str, columns: Optional[List[str]] = None,
+             dtype: Optional[Dict[str, Any]] = None, engine: Optional[str] = None) -> pd.DataFrame:
+    """Read a whole CSV file with the given engine, or CSV_ENGINE.
+
+    All engines return the dtypes pandas' c engine infers: the pyarrow and
+    parallel engines fall back to it, in whole or for single columns,
+    wherever their own inference would disagree.
+    """
+    engine = engine or CSV_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown CSV engine: {engine}")
+
+    if engine == "pyarrow" and pyarrow is not None:
+        df = read_csv_arrow(file_path, columns, dtype)
+        if df is not None:
+            return df
+    elif engine == "parallel" and CSV_PARSE_WORKERS > 1 and compression_of(file_path) is None \
+            and os.path.getsize(file_path) >= CSV_PARALLEL_MIN_BYTES:
+        return _read_parallel(file_path, columns, dtype)
+    return pd.read_csv(file_path, usecols=columns, dtype=dtype)
+
+
+def read_csv_arrow(file_path, columns=None, dtype=None):
+    """Read a CSV with pyarrow's multi-threaded reader, typed like pandas.
+
+    Returns None when the file needs the c engine: duplicate column names,
+    or values Arrow cannot convert with the types it inferred. Self-contained
+    so it can be embedded in generated scripts.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+
+    na_values = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+                 "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
+    dtype = dict(dtype or {})
+    header = list(pd.read_csv(file_path, nrows=0).columns)
+    if len(set(header)) != len(header):
+        return None
+
+    def read(include, column_types):
+        return pa_csv.read_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(use_threads=True),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=include or [],
+                column_types=column_types,
+                null_values=na_values,
+                strings_can_be_null=True,
+                true_values=["True", "TRUE", "true"],
+                false_values=["False", "FALSE", "false"]
+            )
+        )
+
+    def beyond_int64(values):
+        # Only whole numbers, some outside the int64 range: integer text
+        # that overflowed
+        bounds = pc.min_max(values).as_py()
+        if bounds["min"] is None or (bounds["min"] >= -2**63 and bounds["max"] < 2**63):
+            return False
+        return bool(pc.all(pc.equal(pc.floor(values), values)).as_py())
+
+    strings = {col: pa.string() for col, kind in dtype.items() if str(kind) in ("object", "str", "string")}
+    try:
+        table = read(columns, strings)
+        # pandas keeps dates and times as text
+        temporal = [field.name for field in table.schema if pa.types.is_temporal(field.type)]
+        if temporal:
+            text = read(temporal, {col: pa.string() for col in temporal})
+            for col in temporal:
+                table = table.set_column(table.schema.get_field_index(col), col, text.column(col))
+    except pa.ArrowInvalid:
+        return None
+
+    df = table.to_pandas()
+    if columns is not None:
+        df = df[[col for col in header if col in columns]]
+    # Arrow reads integers beyond int64 as lossy doubles where pandas keeps
+    # them as uint64 or text; those columns are parsed by pandas
+    overflowing = [
+        field.name for field in table.schema
+        if pa.types.is_floating(field.type) and beyond_int64(table.column(field.name))
+    ]
+    if overflowing:
+        reparsed = pd.read_csv(file_path, usecols=overflowing,
+                               dtype={col: dtype[col] for col in overflowing if col in dtype})
+        for col in overflowing:
+            df[col] = reparsed[col]
+    for field in table.schema:
+        col = field.name
+        if pa.types.is_null(field.type):
+            df[col] = df[col].astype("float64")
+        elif df[col].dtype == object and table.column(col).null_count:
+            # pandas marks missing text as NaN, Arrow as None
+            df[col] = df[col].fillna(float("nan"))
+    hinted = {col: kind for col, kind in dtype.items() if col in df.columns and col not in strings}
+    return df.astype(hinted) if hinted else df
+
+
+
+def _read_parallel(file_path: str, columns: Optional[List[str]],
+                   dtype: Optional[Dict[str, Any]]) -> pd.DataFrame:
+    """Parse blocks of records in a process pool and concatenate them.
+
+    Blocks are cut at record boundaries found through the row index. A
+    column whose blocks disagree on its type (text in some, numbers in
+    others) is parsed again whole, so it gets the dtype of a c engine read.
+    """
+    from services.partitions import Partitioner
+
+    names = list(pd.read_csv(file_path, nrows=0).columns)
+    ranges = Partitioner.split_rows(file_path, CSV_PARSE_WORKERS)
+    futures = [
+        _process_pool().submit(_parse_block, file_path, start, end, names, columns, dtype)
+        for start, end in ranges
+    ]
+    blocks = [future.result() for future in futures]
+    df = pd.concat(blocks, ignore_index=True)
+
+    conflicting = [
+        col for col in df.columns
+        if len({_kind(block[col]) for block in blocks} - {None}) > 1
+    ]
+    if conflicting:
+        reparsed = pd.read_csv(file_path, usecols=conflicting, dtype=dtype)
+        for col in conflicting:
+            df[col] = reparsed[col]
+    return df
+
+
+def _parse_block(file_path: str, start: int, end: int, names: List[str],
+                 columns: Optional[List[str]], dtype: Optional[Dict[str, Any]]) -> pd.DataFrame:
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # One type per column and block; blocks that disagree are reconciled
+    # by the caller
+    return pd.read_csv(io.BytesIO(data), header=None, names=names, usecols=columns, dtype=dtype,
+                       low_memory=False)
+
+
+def _kind(values: pd.Series) -> Optional[str]:
+    """Broad type of a parsed block column; None when it says nothing."""
+    if values.isna().all():
+        return None
+    if values.dtype == object:
+        return "object"
+    return "bool" if values.dtype == bool else "number"
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # A forkserver keeps workers from inheriting the server's threads
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+            _pool = ProcessPoolExecutor(max_workers=CSV_PARSE_WORKERS, mp_context=context)
+            atexit.register(_pool.shutdown)
+        return _pool
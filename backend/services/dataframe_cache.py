@@ -0,0 +1,106 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional, Tuple
+import pandas as pd
+
+DATAFRAME_CACHE_BYTES = int(os.getenv("DATAFRAME_CACHE_BYTES", 512 * 1024**2))
+
+
+class DataFrameCache:
+    """Process-wide LRU cache of parsed DataFrames under a memory budget.
+
+    Entries are keyed by (path, mtime, size), so an overwritten file misses
+    automatically and its stale frame is dropped. Cached frames are shared
+    between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = DATAFRAME_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._frames: "OrderedDict[Tuple[str, float, int], Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, file_path: str, loader: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
+        """Return the parsed frame for file_path, loading it on a miss."""
+        key = self._key(file_path)
+
+        with self._lock:
+            cached = self._frames.get(key)
+            if cached is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        df = loader(file_path)
+        self.put(file_path, df, key=key)
+        return df
+
+    def peek(self, file_path: str) -> Optional[pd.DataFrame]:
+        """Return the cached frame for file_path without loading it."""
+        key = self._key(file_path)
+        with self._lock:
+            cached = self._frames.get(key)
+            if cached is None:
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return cached[0]
+
+    def put(self, file_path: str, df: pd.DataFrame, key: Tuple[str, float, int] = None) -> None:
+        """Insert a frame, evicting least recently used frames to fit the budget."""
+        key = key or self._key(file_path)
+        nbytes = int(df.memory_usage(deep=True).sum())
+
+        with self._lock:
+            self._drop_path(key[0])
+            if nbytes > self.max_bytes:
+                return
+            self._frames[key] = (df, nbytes)
+            self._current_bytes += nbytes
+            while self._current_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._frames.popitem(last=False)
+                self._current_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def invalidate(self, file_path: str) -> None:
+        """Drop any cached frame for file_path."""
+        with self._lock:
+            self._drop_path(os.path.abspath(file_path))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+            self._current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current memory usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._frames),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    @staticmethod
+    def _key(file_path: str) -> Tuple[str, float, int]:
+        file_stats = os.stat(file_path)
+        return (os.path.abspath(file_path), file_stats.st_mtime, file_stats.st_size)
+
+    def _drop_path(self, abs_path: str) -> None:
+        for key in [k for k in self._frames if k[0] == abs_path]:
+            _, nbytes = self._frames.pop(key)
+            self._current_bytes -= nbytes
+
+
+# Shared by the analyzer and all routers
+dataframe_cache = DataFrameCache()
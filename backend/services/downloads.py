@@ -0,0 +1,229 @@
+import os
+import json
+import stat
+from email.utils import formatdate
+from typing import Optional, Mapping, Tuple
+from urllib.parse import quote
+import anyio
+from starlette.responses import Response, StreamingResponse
+from starlette.datastructures import Headers
+from starlette.types import Scope, Receive, Send
+from services.compression import compression_of, without_compression, open_csv
+from services.file_registry import compute_file_hash
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Internal location of a reverse proxy (e.g. nginx) that serves the backend's
+# working directory; when set, downloads answer with X-Accel-Redirect and the
+# proxy sends the file, ranges included, with the kernel's sendfile
+DOWNLOAD_ACCEL_REDIRECT = os.getenv("DOWNLOAD_ACCEL_REDIRECT", "").rstrip("/")
+
+
+def accepts_encoding(accept_encoding: Optional[str], coding: str) -> bool:
+    """Whether an Accept-Encoding header allows a content coding."""
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() not in (coding, "*"):
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weakly)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """The [start, end) bytes of a single-range Range header.
+
+    Returns None when the header is absent, malformed or asks for several
+    ranges, so the whole file is sent; raises ValueError when the range
+    lies beyond the end of the file.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+    first, _, last = (part.strip() for part in spec.partition("-"))
+    if not (first.isdigit() or (first == "" and last.isdigit())) or not (last.isdigit() or last == ""):
+        return None
+    if first == "":
+        # Suffix range: the last bytes of the file
+        if int(last) == 0 or size == 0:
+            raise ValueError("Range not satisfiable")
+        return max(0, size - int(last)), size
+    start = int(first)
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    end = int(last) + 1 if last else size
+    if end <= start:
+        return None
+    return start, min(end, size)
+
+
+def content_hash(path: str) -> str:
+    """sha256 of a file, kept next to it as ``.<name>.sha256`` for the
+    file version it was computed for."""
+    file_stats = os.stat(path)
+    hash_path = _hash_path(path)
+    try:
+        with open(hash_path, 'r') as f:
+            stored = json.load(f)
+        if stored["mtime"] == file_stats.st_mtime and stored["size"] == file_stats.st_size:
+            return stored["sha256"]
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+
+    digest = compute_file_hash(path)
+    tmp_path = hash_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"mtime": file_stats.st_mtime, "size": file_stats.st_size, "sha256": digest}, f)
+    os.replace(tmp_path, hash_path)
+    return digest
+
+
+def remove_content_hash(path: str) -> None:
+    """Delete the stored hash of a file if present."""
+    hash_path = _hash_path(path)
+    if os.path.exists(hash_path):
+        os.remove(hash_path)
+
+
+def _hash_path(path: str) -> str:
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.sha256")
+
+
+def file_response(path: str, filename: str, request_headers: Mapping[str, str],
+                  sha256: str, media_type: str = 'text/csv') -> Response:
+    """Response sending a stored file, plain or compressed.
+
+    The ETag is the file's content hash. A compressed file goes out as
+    stored with a Content-Encoding when the client accepts its coding, and
+    is decompressed on the fly otherwise; either way the client saves the
+    CSV under filename without the compression suffix. Files sent as
+    stored support Range requests.
+    """
+    compression = compression_of(path)
+    if compression is None:
+        return FileDownload(path, filename, f'"{sha256}"', media_type)
+
+    filename = without_compression(filename)
+    headers = {"Vary": "Accept-Encoding"}
+    if accepts_encoding(request_headers.get("accept-encoding"), compression):
+        headers["Content-Encoding"] = compression
+        return FileDownload(path, filename, f'"{sha256}"', media_type, headers)
+
+    etag = f'"{sha256}-decoded"'
+    headers["ETag"] = etag
+    if etag_matches(request_headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    def decompressed():
+        with open_csv(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+                yield chunk
+
+    headers["Content-Disposition"] = _content_disposition(filename)
+    return StreamingResponse(decompressed(), media_type=media_type, headers=headers)
+
+
+class FileDownload(Response):
+    """A file sent whole or as one byte range, with conditional requests.
+
+    If-None-Match is answered with 304, Range (guarded by If-Range) with
+    206. The bytes go out through the reverse proxy, with its sendfile,
+    when DOWNLOAD_ACCEL_REDIRECT is set, and otherwise from the server in
+    large pread chunks read off the event loop.
+    """
+
+    def __init__(self, path: str, filename: str, etag: str, media_type: str = 'text/csv',
+                 headers: Optional[Mapping[str, str]] = None):
+        self.path = path
+        self.status_code = 200
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.etag = etag
+        self.stat_result = os.stat(path)
+        if not stat.S_ISREG(self.stat_result.st_mode):
+            raise RuntimeError(f"File at path {path} is not a file.")
+        self.headers.setdefault("content-disposition", _content_disposition(filename))
+        self.headers["etag"] = etag
+        self.headers["last-modified"] = formatdate(self.stat_result.st_mtime, usegmt=True)
+        self.headers["accept-ranges"] = "bytes"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        size = self.stat_result.st_size
+
+        if etag_matches(request_headers.get("if-none-match"), self.etag):
+            await self._send_headers(send, 304)
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if DOWNLOAD_ACCEL_REDIRECT:
+            # The proxy answers Range itself
+            self.headers["x-accel-redirect"] = f"{DOWNLOAD_ACCEL_REDIRECT}/{quote(os.path.relpath(self.path))}"
+            await self._send_headers(send, 200)
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        start, end, status = 0, size, 200
+        if_range = request_headers.get("if-range")
+        if if_range is None or if_range.strip() == self.etag:
+            try:
+                byte_range = parse_range(request_headers.get("range"), size)
+            except ValueError:
+                self.headers["content-range"] = f"bytes */{size}"
+                self.headers["content-length"] = "0"
+                await self._send_headers(send, 416)
+                await send({"type": "http.response.body", "body": b""})
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                status = 206
+                self.headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+
+        self.headers["content-length"] = str(end - start)
+        await self._send_headers(send, status)
+        if scope["method"].upper() == "HEAD" or end == start:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        with open(self.path, 'rb') as f:
+            fd = f.fileno()
+            position = start
+            while position < end:
+                chunk = await anyio.to_thread.run_sync(
+                    os.pread, fd, min(DOWNLOAD_CHUNK_SIZE, end - position), position
+                )
+                if not chunk:
+                    break
+                position += len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": position < end})
+            if position < end:
+                # The file shrank while it was sent
+                await send({"type": "http.response.body", "body": b""})
+
+    async def _send_headers(self, send: Send, status: int) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": self.raw_headers})
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
@@ -0,0 +1,188 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, List, Any, Optional
+
+UPLOAD_DIR = "backend/uploads"
+INDEX_FILENAME = ".index.jsonl"
+
+
+def compute_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Compute the sha256 hex digest of a file without loading it into memory."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileRegistry:
+    """In-memory id -> file metadata index backed by an append-only journal.
+
+    Every upload and delete appends one JSON line to the journal in the upload
+    directory, so lookups never have to scan the directory. The journal is
+    replayed and reconciled with the files on disk at startup.
+    """
+
+    def __init__(self, upload_dir: str = UPLOAD_DIR):
+        self.upload_dir = upload_dir
+        self.index_path = os.path.join(upload_dir, INDEX_FILENAME)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._journal_offset = 0
+        self._lock = threading.RLock()
+
+    def rebuild(self) -> None:
+        """Rebuild the index from the journal and the files on disk."""
+        with self._lock:
+            os.makedirs(self.upload_dir, exist_ok=True)
+            self._entries = {}
+            self._journal_offset = 0
+            self._replay_journal()
+
+            # Reconcile with disk: drop entries whose file is gone and adopt
+            # files that were written without going through the registry.
+            on_disk = {}
+            for filename in os.listdir(self.upload_dir):
+                if filename.startswith('.') or '_' not in filename:
+                    continue
+                file_id = filename.split('_', 1)[0]
+                on_disk[file_id] = filename
+
+            for file_id in list(self._entries):
+                if file_id not in on_disk:
+                    del self._entries[file_id]
+
+            for file_id, filename in on_disk.items():
+                entry = self._entries.get(file_id)
+                if entry and os.path.basename(entry["path"]) == filename:
+                    continue
+                file_path = os.path.join(self.upload_dir, filename)
+                if not os.path.isfile(file_path):
+                    continue
+                file_stats = os.stat(file_path)
+                self._entries[file_id] = {
+                    "id": file_id,
+                    "filename": filename.split('_', 1)[1],
+                    "path": file_path,
+                    "size": file_stats.st_size,
+                    "mtime": file_stats.st_mtime,
+                    "content_hash": None,
+                }
+
+            self._compact()
+
+    def register(self, file_id: str, filename: str, file_path: str,
+                 content_hash: Optional[str] = None, **extra: Any) -> Dict[str, Any]:
+        """Record a newly written file and persist it to the journal."""
+        file_stats = os.stat(file_path)
+        entry = {
+            "id": file_id,
+            "filename": filename,
+            "path": file_path,
+            "size": file_stats.st_size,
+            "mtime": file_stats.st_mtime,
+            "content_hash": content_hash,
+        }
+        entry.update(extra)
+
+        with self._lock:
+            self._entries[file_id] = entry
+            self._append({"op": "put", "entry": entry})
+        return dict(entry)
+
+    def update(self, file_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """Merge extra metadata fields into an existing entry."""
+        with self._lock:
+            entry = self._entries.get(file_id)
+            if entry is None:
+                return None
+            entry.update(fields)
+            self._append({"op": "put", "entry": entry})
+            return dict(entry)
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Return the entry for a file id, or None if it is unknown."""
+        with self._lock:
+            entry = self._entries.get(file_id)
+            if entry is None:
+                # Another worker may have registered the file since we last
+                # looked; only the new journal lines need to be read.
+                self._replay_journal()
+                entry = self._entries.get(file_id)
+            return dict(entry) if entry else None
+
+    def get_path(self, file_id: str) -> Optional[str]:
+        """Return the on-disk path of a file id, or None if it is unknown."""
+        entry = self.get(file_id)
+        return entry["path"] if entry else None
+
+    def content_hash_of(self, file_path: str) -> str:
+        """Return the sha256 of a file, reusing the hash recorded for it at
+        upload while the file is unchanged."""
+        file_id = os.path.basename(file_path).split('_', 1)[0]
+        entry = self.get(file_id)
+        file_stats = os.stat(file_path)
+        registered = (
+            entry is not None
+            and os.path.abspath(entry["path"]) == os.path.abspath(file_path)
+            and entry["size"] == file_stats.st_size
+            and entry["mtime"] == file_stats.st_mtime
+        )
+        if registered and entry.get("content_hash"):
+            return entry["content_hash"]
+
+        content_hash = compute_file_hash(file_path)
+        if registered:
+            self.update(file_id, content_hash=content_hash)
+        return content_hash
+
+    def remove(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Forget a file id and persist the removal to the journal."""
+        with self._lock:
+            entry = self._entries.pop(file_id, None)
+            if entry is not None:
+                self._append({"op": "delete", "id": file_id})
+            return entry
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Return all known entries."""
+        with self._lock:
+            self._replay_journal()
+            return [dict(entry) for entry in self._entries.values()]
+
+    def _replay_journal(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r') as f:
+            f.seek(self._journal_offset)
+            for line in iter(f.readline, ''):
+                if not line.endswith('\n'):
+                    # Partially written line from a concurrent writer
+                    break
+                self._journal_offset = f.tell()
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("op") == "put":
+                    self._entries[record["entry"]["id"]] = record["entry"]
+                elif record.get("op") == "delete":
+                    self._entries.pop(record.get("id"), None)
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        os.makedirs(self.upload_dir, exist_ok=True)
+        with open(self.index_path, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+
+    def _compact(self) -> None:
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            for entry in self._entries.values():
+                f.write(json.dumps({"op": "put", "entry": entry}, default=str) + '\n')
+        os.replace(tmp_path, self.index_path)
+        self._journal_offset = os.path.getsize(self.index_path)
+
+
+# Shared by all routers
+file_registry = FileRegistry()
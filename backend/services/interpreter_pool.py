@@ -0,0 +1,289 @@
+import os
+import sys
+import json
+import time
+import atexit
+import select
+import subprocess
+import threading
+from typing import Dict, Any, Optional, Callable
+
+try:
+    from services.resource_limits import apply_rlimits, reap
+except ImportError:
+    # Running as the zygote script, next to resource_limits.py
+    from resource_limits import apply_rlimits, reap
+
+# Pre-warmed interpreters are used wherever fork() is available
+WARM_POOL_ENABLED = os.getenv("SCRIPT_WARM_POOL", "1") != "0" and hasattr(os, "fork")
+WARM_WORKER_MAX_JOBS = int(os.getenv("WARM_WORKER_MAX_JOBS", 100))
+WARM_WORKER_MAX_RSS = int(os.getenv("WARM_WORKER_MAX_RSS", 512 * 1024**2))
+PRELOAD_MODULES = ["pandas", "numpy"]
+
+
+class WarmInterpreter:
+    """A zygote Python process with pandas and numpy already imported.
+
+    For every job the zygote forks a child that runs the script, so each job
+    still gets its own process, but without paying interpreter startup and
+    library imports. Requests and results are exchanged as JSON lines over
+    the zygote's stdin/stdout.
+    """
+
+    def __init__(self):
+        self.jobs = 0
+        self.rss = 0
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--zygote"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+        self._buffer = b''
+        ready = self._read_message(timeout=None)
+        if ready is None or not ready.get("ready"):
+            self.close()
+            raise RuntimeError("Warm interpreter failed to start")
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, script_path: str, cwd: str, stdout_path: str, stderr_path: str,
+            limits: Optional[Dict[str, Any]] = None,
+            cgroup: Optional[str] = None,
+            on_start: Optional[Callable[[int], None]] = None,
+            on_poll: Optional[Callable[[], None]] = None,
+            poll_interval: float = 0.2) -> Dict[str, Any]:
+        """Run a script in a forked child and wait for it to exit.
+
+        The child applies limits to itself and joins the cgroup directory,
+        if given, before the script starts. on_start receives the child's pid
+        and on_poll is called every poll_interval seconds while it runs.
+        """
+        request = {
+            "script_path": script_path,
+            "cwd": cwd,
+            "stdout_path": stdout_path,
+            "stderr_path": stderr_path,
+            "limits": limits or {},
+            "cgroup": cgroup
+        }
+        self.process.stdin.write((json.dumps(request) + "\n").encode())
+        self.process.stdin.flush()
+        self.jobs += 1
+
+        started = self._read_message(timeout=None)
+        if started is None:
+            raise RuntimeError("Warm interpreter exited unexpectedly")
+        if on_start is not None:
+            on_start(started["pid"])
+
+        while True:
+            result = self._read_message(timeout=poll_interval)
+            if result is not None:
+                break
+            if not self.alive():
+                raise RuntimeError("Warm interpreter exited unexpectedly")
+            if on_poll is not None:
+                on_poll()
+
+        self.rss = result.get("zygote_rss", 0)
+        return result
+
+    def close(self) -> None:
+        if self.alive():
+            self.process.kill()
+            self.process.wait()
+
+    def _read_message(self, timeout: Optional[float]) -> Optional[Dict[str, Any]]:
+        fd = self.process.stdout.fileno()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b'\n' not in self._buffer:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                return None
+            data = os.read(fd, 65536)
+            if not data:
+                return None
+            self._buffer += data
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return json.loads(line)
+
+
+class InterpreterPool:
+    """Pool of warm interpreters, recycled after a number of jobs or when
+    their memory grows past a high-water mark."""
+
+    def __init__(self, max_jobs: int = WARM_WORKER_MAX_JOBS, max_rss: int = WARM_WORKER_MAX_RSS):
+        self.max_jobs = max_jobs
+        self.max_rss = max_rss
+        self._idle = []
+        self._all = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        return WARM_POOL_ENABLED
+
+    def run(self, script_path: str, cwd: str, stdout_path: str, stderr_path: str,
+            limits: Optional[Dict[str, Any]] = None,
+            cgroup: Optional[str] = None,
+            on_start: Optional[Callable[[int], None]] = None,
+            on_poll: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """Run a script on an idle warm interpreter, starting one if needed."""
+        interpreter = self._checkout()
+        try:
+            return interpreter.run(script_path, cwd, stdout_path, stderr_path, limits, cgroup,
+                                   on_start=on_start, on_poll=on_poll)
+        except Exception:
+            interpreter.close()
+            raise
+        finally:
+            self._checkin(interpreter)
+
+    def close(self) -> None:
+        with self._lock:
+            for interpreter in self._all:
+                interpreter.close()
+            self._idle, self._all = [], []
+
+    def _checkout(self) -> WarmInterpreter:
+        with self._lock:
+            while self._idle:
+                interpreter = self._idle.pop()
+                if interpreter.alive():
+                    return interpreter
+                self._all.remove(interpreter)
+        interpreter = WarmInterpreter()
+        with self._lock:
+            self._all.append(interpreter)
+        return interpreter
+
+    def _checkin(self, interpreter: WarmInterpreter) -> None:
+        recycle = (not interpreter.alive()
+                   or interpreter.jobs >= self.max_jobs
+                   or interpreter.rss > self.max_rss)
+        with self._lock:
+            if recycle:
+                if interpreter in self._all:
+                    self._all.remove(interpreter)
+            else:
+                self._idle.append(interpreter)
+        if recycle:
+            interpreter.close()
+
+
+# Shared by all script executions
+interpreter_pool = InterpreterPool()
+atexit.register(interpreter_pool.close)
+
+
+def _reset_after_fork() -> None:
+    """Give a forked job the fresh random state a new interpreter has.
+
+    Every job is forked from the same zygote, so without this they would
+    all continue numpy's global generator from the same state. The zygote
+    runs no job code, so preloaded modules hold no other per-job state.
+    """
+    import random
+    random.seed()
+    numpy = sys.modules.get("numpy")
+    if numpy is not None:
+        # Seeded from the OS entropy source
+        numpy.random.seed()
+
+
+def _run_child(request: Dict[str, Any], channel_fd: int) -> None:
+    """Body of a forked job process; never returns."""
+    code = 1
+    try:
+        os.close(channel_fd)
+        _reset_after_fork()
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        for fd, path in ((1, request["stdout_path"]), (2, request["stderr_path"])):
+            target = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            os.dup2(target, fd)
+            os.close(target)
+        # Flush every line so output can be followed while the job runs
+        sys.stdout.reconfigure(line_buffering=True)
+        sys.stderr.reconfigure(line_buffering=True)
+
+        if request.get("cgroup"):
+            with open(os.path.join(request["cgroup"], "cgroup.procs"), 'w') as f:
+                f.write(str(os.getpid()))
+        apply_rlimits(request.get("limits") or {})
+
+        os.chdir(request["cwd"])
+        sys.argv = [request["script_path"]]
+        sys.path[0] = request["cwd"]
+
+        import runpy
+        import traceback
+        try:
+            runpy.run_path(request["script_path"], run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException as e:
+            # Hide the runpy frames so the traceback reads like a plain run
+            tb = e.__traceback__
+            while tb is not None and tb.tb_frame.f_code.co_filename != request["script_path"]:
+                tb = tb.tb_next
+            traceback.print_exception(type(e), e, tb or e.__traceback__)
+            code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def _resident_memory() -> int:
+    """Current resident set size of this process in bytes, or 0 where
+    /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _zygote_main() -> None:
+    import importlib
+
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+
+    # Keep the protocol channel off fd 1 so forked jobs can own stdout
+    channel_fd = os.dup(1)
+    channel = os.fdopen(channel_fd, 'w', buffering=1)
+
+    def send(message: Dict[str, Any]) -> None:
+        channel.write(json.dumps(message) + "\n")
+        channel.flush()
+
+    send({"ready": True})
+    for line in sys.stdin:
+        request = json.loads(line)
+        pid = os.fork()
+        if pid == 0:
+            _run_child(request, channel_fd)
+
+        send({"pid": pid})
+        result = reap(pid)
+        # Jobs run in forked children, so only the zygote's own current
+        # memory is measured, not a peak it never comes back from
+        result["zygote_rss"] = _resident_memory()
+        send(result)
+
+
+if __name__ == "__main__" and sys.argv[1:] == ["--zygote"]:
+    _zygote_main()
@@ -0,0 +1,89 @@
+import os
+import threading
+from collections import deque
+from typing import List, Optional
+
+# Job logs are appended to backend/logs/<job_id>.log; only the most recent
+# JOB_LOG_RING_SIZE lines of each job are kept in memory.
+LOG_DIR = os.getenv("SCRIPT_LOG_DIR", "backend/logs")
+JOB_LOG_RING_SIZE = int(os.getenv("JOB_LOG_RING_SIZE", 1000))
+
+
+class JobLog:
+    """Log of one job: a bounded ring of recent lines in memory backed by an
+    append-only file that holds the full log and can be tailed while the job
+    runs."""
+
+    def __init__(self, job_id: str, max_lines: int = JOB_LOG_RING_SIZE):
+        self.job_id = job_id
+        self.path = JobLog.log_path(job_id)
+        self.lines = deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+
+    @staticmethod
+    def log_path(job_id: str) -> str:
+        return os.path.join(LOG_DIR, f"{job_id}.log")
+
+    def append(self, line: str) -> None:
+        """Record one line; it is on disk as soon as this returns."""
+        line = line.replace('\n', ' ')
+        with self._lock:
+            self.lines.append(line)
+            if not self._file.closed:
+                self._file.write(line + '\n')
+
+    def tail(self, limit: Optional[int] = None) -> List[str]:
+        with self._lock:
+            lines = list(self.lines)
+        return lines[-limit:] if limit else lines
+
+    def __iter__(self):
+        return iter(self.tail())
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    @staticmethod
+    def read(job_id: str, limit: int = JOB_LOG_RING_SIZE) -> List[str]:
+        """Return the last lines of a job's log file, from any process."""
+        try:
+            with open(JobLog.log_path(job_id), 'r', encoding='utf-8', errors='replace') as f:
+                return [line.rstrip('\n') for line in deque(f, maxlen=limit)]
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def remove(job_id: str) -> None:
+        """Delete the log file of a job."""
+        path = JobLog.log_path(job_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class OutputTail:
+    """Reads the complete lines appended to a file since the last call."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.position = 0
+        self._partial = b''
+
+    def read_lines(self, final: bool = False) -> List[str]:
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self.position)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        self.position += len(data)
+
+        data = self._partial + data
+        lines = data.split(b'\n')
+        self._partial = lines.pop()
+        if final and self._partial:
+            lines.append(self._partial)
+            self._partial = b''
+        return [line.rstrip(b'\r').decode('utf-8', errors='replace') for line in lines]
@@ -0,0 +1,113 @@
+import os
+import heapq
+import itertools
+import threading
+from typing import Callable, Dict, Any, Optional
+
+SCRIPT_WORKERS = int(os.getenv("SCRIPT_WORKERS", max((os.cpu_count() or 2) // 2, 1)))
+SCRIPT_QUEUE_SIZE = int(os.getenv("SCRIPT_QUEUE_SIZE", 100))
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobScheduler:
+    """Priority job queue drained by a fixed number of dedicated worker threads.
+
+    Jobs never run on the API server's threadpool. Higher priority jobs run
+    first, jobs of equal priority run in submission order, and submissions
+    beyond max_queue waiting jobs are rejected instead of piling up.
+    """
+
+    def __init__(self, workers: int = SCRIPT_WORKERS, max_queue: int = SCRIPT_QUEUE_SIZE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._heap = []
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = []
+
+    def submit(self, job_id: str, func: Callable[..., Any], *args: Any, priority: int = 0) -> int:
+        """Queue func(*args, cancel_event) and return the job's queue position."""
+        with self._condition:
+            if len(self._heap) >= self.max_queue:
+                raise QueueFull(f"Job queue is full ({self.max_queue} jobs waiting)")
+
+            self._start_workers()
+            job = {
+                "func": func,
+                "args": args,
+                "cancel_event": threading.Event(),
+                "state": "queued"
+            }
+            self._jobs[job_id] = job
+            heapq.heappush(self._heap, (-priority, next(self._sequence), job_id))
+            self._condition.notify()
+            return self._position(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job. Returns False if it is unknown or done."""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            job["cancel_event"].set()
+            if job["state"] == "queued":
+                self._heap = [entry for entry in self._heap if entry[2] != job_id]
+                heapq.heapify(self._heap)
+                del self._jobs[job_id]
+            return True
+
+    def position(self, job_id: str) -> Optional[int]:
+        """Return the 1-based queue position of a waiting job, or None."""
+        with self._condition:
+            return self._position(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            running = sum(1 for job in self._jobs.values() if job["state"] == "running")
+            return {
+                "workers": self.workers,
+                "running": running,
+                "queued": len(self._heap),
+                "max_queue": self.max_queue
+            }
+
+    def _position(self, job_id: str) -> Optional[int]:
+        job = self._jobs.get(job_id)
+        if job is None or job["state"] != "queued":
+            return None
+        for position, entry in enumerate(sorted(self._heap), start=1):
+            if entry[2] == job_id:
+                return position
+        return None
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, name=f"script-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                _, _, job_id = heapq.heappop(self._heap)
+                job = self._jobs[job_id]
+                job["state"] = "running"
+
+            try:
+                job["func"](*job["args"], job["cancel_event"])
+            except Exception:
+                # The job function records its own failure
+                pass
+            finally:
+                with self._condition:
+                    self._jobs.pop(job_id, None)
+
+
+# Shared by the scripts router
+job_scheduler = JobScheduler()
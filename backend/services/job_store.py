@@ -0,0 +1,320 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Any, Optional, Tuple
+
+# Jobs are stored in a SQLite database shared by all server workers on a
+# node; JOB_STORE=memory keeps them in the process instead.
+JOB_STORE_BACKEND = os.getenv("JOB_STORE", "sqlite")
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "backend/jobs.db")
+# Finished jobs and their outputs are purged this many seconds after they end
+JOB_TTL = int(os.getenv("JOB_TTL", 7 * 24 * 3600))
+JOB_PURGE_INTERVAL = int(os.getenv("JOB_PURGE_INTERVAL", 3600))
+
+# Every unfinished job is leased by the server worker that queued it, which
+# renews the lease while it lives; jobs whose lease ran out belong to a
+# worker that is gone and are failed
+JOB_LEASE = int(os.getenv("JOB_LEASE", 60))
+# Identifies this server process; the random part tells it apart from an
+# earlier process that had the same pid
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+JOB_FIELDS = ("status", "logs", "output_file", "error", "resources",
+              "created_at", "updated_at", "finished_at", "owner", "lease_until")
+
+
+class JobStore(ABC):
+    """Interface of a job store.
+
+    A job is a dict with job_id, status, logs, output_file, error, the
+    resources it used, the created_at/updated_at/finished_at timestamps and
+    the owner worker and lease_until time of its lease.
+    """
+
+    @abstractmethod
+    def create(self, job_id: str, **fields: Any) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, job_id: str, **fields: Any) -> bool:
+        """Update fields of a job. Returns False if the job does not exist."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, job_id: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list(self, status: Optional[str] = None, limit: int = 50,
+             offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Return one page of jobs, newest first, and the total count."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def pop_expired(self, ttl: int = JOB_TTL) -> List[Dict[str, Any]]:
+        """Remove and return jobs that finished more than ttl seconds ago."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def renew_leases(self, owner: str = WORKER_ID, lease: int = JOB_LEASE) -> int:
+        """Extend the leases of an owner's unfinished jobs; returns how many."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def fail_interrupted(self, error: str = "Job was interrupted by a server restart") -> int:
+        """Fail the unfinished jobs whose lease has run out; returns how many.
+
+        Their owner stopped renewing it, so it is gone and nobody will run
+        or finish them.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _new_job(job_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "logs": [],
+            "output_file": None,
+            "error": None,
+            "resources": None,
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None,
+            "owner": WORKER_ID,
+            "lease_until": now + JOB_LEASE
+        }
+        job.update(fields)
+        return job
+
+    @staticmethod
+    def _changes(fields: Dict[str, Any]) -> Dict[str, Any]:
+        unknown = set(fields) - set(JOB_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+        changes = dict(fields, updated_at=time.time())
+        if fields.get("status") in FINISHED_STATUSES:
+            changes.setdefault("finished_at", changes["updated_at"])
+        return changes
+
+
+class MemoryJobStore(JobStore):
+    """Job store local to one process."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, **fields: Any) -> Dict[str, Any]:
+        job = self._new_job(job_id, fields)
+        with self._lock:
+            self._jobs[job_id] = job
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id: str, **fields: Any) -> bool:
+        changes = self._changes(fields)
+        with self._lock:
+            if job_id not in self._jobs:
+                return False
+            self._jobs[job_id].update(changes)
+            return True
+
+    def delete(self, job_id: str) -> bool:
+        with self._lock:
+            return self._jobs.pop(job_id, None) is not None
+
+    def list(self, status: Optional[str] = None, limit: int = 50,
+             offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values() if status is None or job["status"] == status]
+        jobs.sort(key=lambda job: job["created_at"], reverse=True)
+        return jobs[offset:offset + limit], len(jobs)
+
+    def pop_expired(self, ttl: int = JOB_TTL) -> List[Dict[str, Any]]:
+        cutoff = time.time() - ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job["finished_at"] is not None and job["finished_at"] < cutoff]
+            return [self._jobs.pop(job_id) for job_id in expired]
+
+    def renew_leases(self, owner: str = WORKER_ID, lease: int = JOB_LEASE) -> int:
+        lease_until = time.time() + lease
+        with self._lock:
+            owned = [job for job in self._jobs.values()
+                     if job["owner"] == owner and job["status"] not in FINISHED_STATUSES]
+            for job in owned:
+                job["lease_until"] = lease_until
+        return len(owned)
+
+    def fail_interrupted(self, error: str = "Job was interrupted by a server restart") -> int:
+        changes = self._changes({"status": "failed", "error": error})
+        with self._lock:
+            interrupted = [job for job in self._jobs.values()
+                           if job["status"] not in FINISHED_STATUSES and job["lease_until"] < changes["updated_at"]]
+            for job in interrupted:
+                job.update(changes)
+        return len(interrupted)
+
+
+class SQLiteJobStore(JobStore):
+    """Job store in a SQLite database in WAL mode.
+
+    Every thread gets its own connection. WAL lets the server workers of a
+    node read while another one writes, and the status and creation time
+    indexes keep listing and purging cheap as the table grows.
+    """
+
+    _finished = ", ".join("?" for _ in FINISHED_STATUSES)
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    logs TEXT NOT NULL DEFAULT '[]',
+                    output_file TEXT,
+                    error TEXT,
+                    resources TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL,
+                    owner TEXT,
+                    lease_until REAL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+                CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at);
+                CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+            """)
+            columns = {row["name"] for row in connection.execute("PRAGMA table_info(jobs)")}
+            if "resources" not in columns:
+                connection.execute("ALTER TABLE jobs ADD COLUMN resources TEXT")
+            if "owner" not in columns:
+                # Jobs from before leases have none and count as expired
+                connection.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+                connection.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner)")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _to_row(fields: Dict[str, Any]) -> Dict[str, Any]:
+        fields = dict(fields)
+        if "logs" in fields:
+            fields["logs"] = json.dumps(list(fields["logs"]))
+        if fields.get("resources") is not None:
+            fields["resources"] = json.dumps(fields["resources"])
+        return fields
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["logs"] = json.loads(job["logs"])
+        job["resources"] = json.loads(job["resources"]) if job["resources"] else None
+        return job
+
+    def create(self, job_id: str, **fields: Any) -> Dict[str, Any]:
+        job = self._new_job(job_id, fields)
+        row = self._to_row(job)
+        columns = ", ".join(row)
+        placeholders = ", ".join(f":{column}" for column in row)
+        self._connection().execute(f"INSERT INTO jobs ({columns}) VALUES ({placeholders})", row)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def update(self, job_id: str, **fields: Any) -> bool:
+        row = self._to_row(self._changes(fields))
+        assignments = ", ".join(f"{column} = :{column}" for column in row)
+        cursor = self._connection().execute(
+            f"UPDATE jobs SET {assignments} WHERE job_id = :job_id", dict(row, job_id=job_id)
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, job_id: str) -> bool:
+        cursor = self._connection().execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        return cursor.rowcount > 0
+
+    def list(self, status: Optional[str] = None, limit: int = 50,
+             offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        connection = self._connection()
+        where, params = ("WHERE status = ?", (status,)) if status else ("", ())
+        total = connection.execute(f"SELECT COUNT(*) FROM jobs {where}", params).fetchone()[0]
+        rows = connection.execute(
+            f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            params + (limit, offset)
+        ).fetchall()
+        return [self._from_row(row) for row in rows], total
+
+    def pop_expired(self, ttl: int = JOB_TTL) -> List[Dict[str, Any]]:
+        connection = self._connection()
+        cutoff = time.time() - ttl
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = connection.execute(
+                "SELECT * FROM jobs WHERE finished_at < ?", (cutoff,)
+            ).fetchall()
+            connection.execute("DELETE FROM jobs WHERE finished_at < ?", (cutoff,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return [self._from_row(row) for row in rows]
+
+    def renew_leases(self, owner: str = WORKER_ID, lease: int = JOB_LEASE) -> int:
+        cursor = self._connection().execute(
+            f"UPDATE jobs SET lease_until = ? WHERE owner = ? AND status NOT IN ({self._finished})",
+            (time.time() + lease, owner) + FINISHED_STATUSES
+        )
+        return cursor.rowcount
+
+    def fail_interrupted(self, error: str = "Job was interrupted by a server restart") -> int:
+        row = self._to_row(self._changes({"status": "failed", "error": error}))
+        assignments = ", ".join(f"{column} = ?" for column in row)
+        cursor = self._connection().execute(
+            f"UPDATE jobs SET {assignments} WHERE status NOT IN ({self._finished}) "
+            f"AND (lease_until IS NULL OR lease_until < ?)",
+            tuple(row.values()) + FINISHED_STATUSES + (row["updated_at"],)
+        )
+        return cursor.rowcount
+
+
+def create_job_store(backend: str = JOB_STORE_BACKEND) -> JobStore:
+    if backend == "memory":
+        return MemoryJobStore()
+    if backend == "sqlite":
+        return SQLiteJobStore()
+    raise ValueError(f"Unknown job store backend: {backend}")
+
+
+# Shared by the scripts router
+job_store = create_job_store()
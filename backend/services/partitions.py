@@ -0,0 +1,177 @@
+import io
+import os
+from typing import Dict, List, Any
+import pandas as pd
+from services.compression import open_csv
+from services.row_index import RowIndex, RowIndexBuilder, SCAN_CHUNK_SIZE
+
+# Partition processes run at most this many at a time per job
+PARALLELISM = int(os.getenv("SCRIPT_PARALLELISM", 0)) or os.cpu_count() or 1
+
+PARTITION_MODES = {"file", "rows"}
+
+
+class Partitioner:
+    """Splits the inputs of a script job into partitions that run in parallel.
+
+    With ``by="file"`` every input file is a partition of its own. With
+    ``by="rows"`` the first input is cut into row ranges at record
+    boundaries, each written as a CSV with the original header; the other
+    inputs are given whole to every partition. Row ranges of a compressed
+    input are cut from its decompressed data and written compressed alike.
+    """
+
+    @staticmethod
+    def validate(spec: Dict[str, Any], input_count: int) -> None:
+        """Raise ValueError if a partition spec cannot run on input_count files."""
+        if spec.get("by") not in PARTITION_MODES:
+            raise ValueError(f"Partition mode must be one of {', '.join(sorted(PARTITION_MODES))}")
+        if input_count == 0:
+            raise ValueError("A partitioned job needs at least one input file")
+        partitions = spec.get("partitions")
+        if partitions is not None and partitions < 1:
+            raise ValueError("partitions must be at least 1")
+
+    @staticmethod
+    def plan(spec: Dict[str, Any], input_files: List[str], work_dir: str) -> List[List[str]]:
+        """Return the input files of every partition.
+
+        Row-range files are written under work_dir, one directory per
+        partition, keeping the input's file name so scripts find it under
+        the same key.
+        """
+        if spec["by"] == "file":
+            return [[file_path] for file_path in input_files]
+
+        ranges = Partitioner.split_rows(input_files[0], spec.get("partitions") or PARALLELISM)
+        name = os.path.basename(input_files[0])
+        part_paths = []
+        for i in range(len(ranges)):
+            directory = os.path.join(work_dir, f"p{i}")
+            os.makedirs(directory, exist_ok=True)
+            part_paths.append(os.path.join(directory, name))
+        Partitioner.write_ranges(input_files[0], list(zip(part_paths, ranges)))
+        return [[part_path] + input_files[1:] for part_path in part_paths]
+
+    @staticmethod
+    def split_rows(csv_path: str, parts: int) -> List[tuple]:
+        """Cut the records of a CSV into up to parts byte ranges of about
+        equal row counts.
+
+        Boundaries come from the file's row index; an index too coarse for
+        the requested split is rebuilt in memory with a finer stride.
+        """
+        index = RowIndex.get_or_build(csv_path)
+        rows_per_part = max(1, -(-index["rows"] // parts))
+        if rows_per_part < index["stride"]:
+            builder = RowIndexBuilder(rows_per_part)
+            with open_csv(csv_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(SCAN_CHUNK_SIZE), b''):
+                    builder.feed(chunk)
+            index = builder.finish()
+
+        offsets = index["offsets"]
+        starts = sorted({
+            int(offsets[min(round(i * rows_per_part / index["stride"]), len(offsets) - 1)])
+            for i in range(parts)
+        })
+        size = index["length"]
+        return [(start, end) for start, end in zip(starts, starts[1:] + [size]) if end > start] or [(size, size)]
+
+    @staticmethod
+    def write_range(csv_path: str, target: str, start: int, end: int) -> None:
+        """Write the header of csv_path followed by the bytes [start, end)."""
+        Partitioner.write_ranges(csv_path, [(target, (start, end))])
+
+    @staticmethod
+    def write_ranges(csv_path: str, targets: List[tuple]) -> None:
+        """Write (target, (start, end)) ranges of csv_path, each after the
+        header, in one pass over the file; ranges must be in file order."""
+        header_end = Partitioner.header_end(csv_path)
+        with open_csv(csv_path, 'rb') as header_src:
+            header = header_src.read(header_end)
+        with open_csv(csv_path, 'rb') as src:
+            for target, (start, end) in targets:
+                with open_csv(target, 'wb') as dst:
+                    dst.write(header)
+                    _copy_range(src, dst, start, end - start)
+
+    @staticmethod
+    def header_end(csv_path: str) -> int:
+        """Byte offset at which the first record after the header starts."""
+        builder = RowIndexBuilder()
+        with open_csv(csv_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(SCAN_CHUNK_SIZE), b''):
+                builder.feed(chunk)
+                if builder.header_end is not None:
+                    return builder.header_end
+        return builder.position
+
+    @staticmethod
+    def concat(paths: List[str], output_path: str) -> None:
+        """Concatenate CSV outputs of partitions into output_path.
+
+        Outputs with identical headers are joined byte for byte, keeping one
+        header; otherwise they are combined with pandas, aligning columns.
+        """
+        headers = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                headers.append(f.read(Partitioner.header_end(path)))
+
+        if len(set(headers)) > 1:
+            pd.concat([pd.read_csv(path) for path in paths], ignore_index=True).to_csv(output_path, index=False)
+            return
+
+        with open(output_path, 'wb') as dst:
+            for i, path in enumerate(paths):
+                with open(path, 'rb') as src:
+                    start = 0 if i == 0 else len(headers[i])
+                    length = os.fstat(src.fileno()).st_size - start
+                    if length > 0 and i > 0 and dst.tell() > 0:
+                        _ensure_newline(dst)
+                    _copy_range(src, dst, start, length)
+
+
+def _copy_range(src, dst, offset: int, length: int) -> None:
+    """Copy length bytes of src from offset to the current end of dst,
+    in the kernel where the platform allows it and neither file is
+    compressed."""
+    if length <= 0:
+        return
+    dst.flush()
+    if hasattr(os, "copy_file_range") and _is_plain(src) and _is_plain(dst):
+        out_offset = dst.tell()
+        try:
+            while length > 0:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), length, offset, out_offset)
+                if copied == 0:
+                    break
+                offset += copied
+                out_offset += copied
+                length -= copied
+            dst.seek(out_offset)
+            return
+        except OSError:
+            # Not supported for these files; copy the rest in user space
+            dst.seek(out_offset)
+    src.seek(offset)
+    while length > 0:
+        block = src.read(min(length, SCAN_CHUNK_SIZE))
+        if not block:
+            break
+        dst.write(block)
+        length -= len(block)
+
+
+def _is_plain(f) -> bool:
+    return isinstance(f, (io.BufferedReader, io.BufferedWriter, io.FileIO))
+
+
+def _ensure_newline(dst) -> None:
+    """Terminate the last record written to dst if it has no newline."""
+    dst.flush()
+    with open(dst.name, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b'\n':
+            dst.write(b'\n')
@@ -0,0 +1,588 @@
+import os
+import time
+import threading
+from typing import Dict, List, Any, Callable, Iterator, Optional, Set, Tuple
+import pandas as pd
+from services.csv_analyzer import CSVAnalyzer, CHUNK_ROWS
+from services.columnar_store import ColumnarStore
+from services.compression import open_csv
+
+OPERATORS: Dict[str, Callable[[pd.Series, Any], pd.Series]] = {
+    "==": lambda s, v: s == v,
+    "!=": lambda s, v: s != v,
+    ">": lambda s, v: s > v,
+    ">=": lambda s, v: s >= v,
+    "<": lambda s, v: s < v,
+    "<=": lambda s, v: s <= v,
+    "in": lambda s, v: s.isin(v),
+    "not in": lambda s, v: ~s.isin(v),
+    "is null": lambda s, v: s.isna(),
+    "not null": lambda s, v: s.notna(),
+    "contains": lambda s, v: s.astype(str).str.contains(str(v), regex=False) & s.notna(),
+    "startswith": lambda s, v: s.astype(str).str.startswith(str(v)) & s.notna(),
+}
+AGGREGATIONS = {"sum", "mean", "median", "min", "max", "count", "nunique", "std", "first", "last"}
+JOIN_TYPES = {"inner", "left", "right", "outer"}
+FILL_STRATEGIES = {"value", "mean", "median", "mode", "auto"}
+# Aggregations whose partial results over chunks can be merged exactly
+STREAMING_AGGREGATIONS = {"sum", "count", "min", "max", "mean", "std", "first", "last"}
+
+
+class PipelineError(ValueError):
+    """Raised for an invalid pipeline spec or a step that cannot be applied."""
+
+
+class PipelineCancelled(Exception):
+    """Raised between steps when a running pipeline is cancelled."""
+
+
+class Pipeline:
+    """Declarative transform pipelines executed in-process with pandas.
+
+    A pipeline is a list of steps applied to the first input file:
+
+    - ``{"op": "filter", "column": "age", "operator": ">", "value": 30}``
+    - ``{"op": "select", "columns": ["a", "b"]}``
+    - ``{"op": "groupby", "by": ["category"], "aggregations": {"value": "mean"}}``
+    - ``{"op": "join", "input": 1, "on": ["id"], "how": "inner"}`` (``"input": "rest"``
+      joins every other input in turn; with ``"otherwise": "concat"`` an
+      input either side lacks the ``on`` columns for is concatenated instead)
+    - ``{"op": "concat", "input": "rest"}`` (appends the rows of other inputs,
+      aligning columns by name)
+    - ``{"op": "fillna", "strategy": "value", "value": 0, "columns": ["a"]}``
+    - ``{"op": "dedupe", "subset": ["id"], "keep": "first"}``
+    - ``{"op": "sort", "by": ["a"], "ascending": true}``
+
+    Leading filters are pushed into the reader, which drops non-matching
+    rows chunk by chunk, and only the columns later steps need are read.
+    """
+
+    @staticmethod
+    def validate(steps: List[Dict[str, Any]], input_count: int) -> None:
+        """Check a pipeline spec without reading any data."""
+        if not steps:
+            raise PipelineError("A pipeline needs at least one step")
+        for position, step in enumerate(steps, start=1):
+            op = step.get("op")
+            validator = _VALIDATORS.get(op)
+            if validator is None:
+                raise PipelineError(f"Step {position}: unknown op {op!r}")
+            try:
+                validator(step, input_count)
+            except PipelineError as e:
+                raise PipelineError(f"Step {position} ({op}): {e}")
+
+    @staticmethod
+    def plan(steps: List[Dict[str, Any]]) -> Tuple[Optional[Set[str]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Split a pipeline into what the reader of the first input can do.
+
+        Returns the columns to read (None for all), the filters to apply
+        while reading and the remaining steps. Filters move into the reader
+        only when preceded by nothing but filters and sorts, which they
+        commute with. Projection is not pushed past joins and concats, whose
+        output columns depend on every input.
+        """
+        pushed, remaining = [], []
+        for step in steps:
+            if step["op"] == "filter" and all(s["op"] in ("filter", "sort") for s in remaining):
+                pushed.append(step)
+            else:
+                remaining.append(step)
+
+        needed: Optional[Set[str]] = None
+        for step in reversed(steps):
+            op = step["op"]
+            if op in ("join", "concat"):
+                return None, pushed, remaining
+            if op == "select":
+                needed = set(step["columns"])
+            elif op == "groupby":
+                needed = set(step["by"]) | set(step["aggregations"])
+            elif needed is not None:
+                if op == "dedupe" and not step.get("subset"):
+                    # Duplicates are judged on every column present
+                    needed = None
+                else:
+                    needed |= _referenced_columns(step)
+        return needed, pushed, remaining
+
+    @staticmethod
+    def can_stream(steps: List[Dict[str, Any]]) -> bool:
+        """Whether a pipeline can run chunk by chunk in bounded memory.
+
+        Every step up to the first groupby must work row by row (filter,
+        select, fillna with a constant) and the groupby's aggregations must
+        be mergeable across chunks. Steps after the groupby run on the
+        aggregated result.
+        """
+        for step in steps:
+            if step["op"] == "groupby":
+                return all(
+                    agg in STREAMING_AGGREGATIONS
+                    for aggs in step["aggregations"].values()
+                    for agg in (aggs if isinstance(aggs, list) else [aggs])
+                )
+            if not _is_row_wise(step):
+                return False
+        return True
+
+    @staticmethod
+    def iter_input(file_path: str, columns: Optional[List[str]] = None,
+                   filters: Optional[List[Dict[str, Any]]] = None,
+                   chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """Yield an input chunk by chunk with projection and filters applied.
+
+        Chunks come from the columnar sidecar when there is one, otherwise
+        from the CSV parsed with the dtypes of a full read. Left to infer
+        their own, chunks could disagree, so a file that has not been
+        profiled is profiled first (in one streaming pass if it is large).
+        """
+        chunks = ColumnarStore.iter_batches(file_path, columns, chunk_rows)
+        if chunks is None:
+            dtype = CSVAnalyzer.profiled_dtypes(file_path)
+            if dtype is None:
+                profile = CSVAnalyzer.get_profile(file_path)
+                dtype = {col: info["dtype"] for col, info in profile["columns"].items()}
+            if columns is not None:
+                dtype = {col: dtype[col] for col in columns if col in dtype}
+            chunks = pd.read_csv(file_path, usecols=columns, dtype=dtype, chunksize=chunk_rows)
+        for chunk in chunks:
+            yield _apply_filters(chunk, filters) if filters else chunk
+
+    @staticmethod
+    def read_input(file_path: str, columns: Optional[List[str]] = None,
+                   filters: Optional[List[Dict[str, Any]]] = None,
+                   chunk_rows: int = CHUNK_ROWS) -> pd.DataFrame:
+        """Read an input with projection and filters applied while reading.
+
+        Without filters this goes through the shared DataFrame cache. With
+        filters the data is read chunk by chunk and only matching rows are
+        kept.
+        """
+        if not filters:
+            return CSVAnalyzer.load_dataframe(file_path, columns)
+
+        parts = list(Pipeline.iter_input(file_path, columns, filters, chunk_rows))
+        if not parts:
+            return pd.read_csv(file_path, usecols=columns, nrows=0)
+        return pd.concat(parts, ignore_index=True)
+
+    @staticmethod
+    def choose_mode(steps: List[Dict[str, Any]], input_files: List[str], mode: str = "auto") -> str:
+        """Resolve the execution mode of a pipeline to "memory" or "streaming".
+
+        In auto mode pipelines stream when they can and their input is too
+        large to load whole.
+        """
+        if mode not in ("auto", "memory", "streaming"):
+            raise PipelineError("mode must be 'auto', 'memory' or 'streaming'")
+        if mode == "streaming" and not Pipeline.can_stream(steps):
+            raise PipelineError(
+                "Only filter, select and constant fillna steps, optionally followed by a groupby "
+                f"with {', '.join(sorted(STREAMING_AGGREGATIONS))} aggregations, can run in streaming mode"
+            )
+        if mode == "auto":
+            too_large = not CSVAnalyzer.fits_in_memory(input_files[0])
+            return "streaming" if too_large and Pipeline.can_stream(steps) else "memory"
+        return mode
+
+    @staticmethod
+    def run(steps: List[Dict[str, Any]], input_files: List[str], output_path: str,
+            log: Optional[Callable[[str], None]] = None,
+            cancel_event: Optional[threading.Event] = None,
+            mode: str = "auto", chunk_rows: int = CHUNK_ROWS,
+            compression: Optional[str] = "infer") -> Dict[str, Any]:
+        """Execute a pipeline and write its result to output_path as CSV,
+        compressed as its name tells unless compression says otherwise.
+
+        In streaming mode the input is processed chunk by chunk: filtered
+        rows are appended to the output as they come, and a groupby keeps
+        only per-group partial aggregates that are merged at the end, so
+        memory depends on chunk_rows and the number of groups, not on the
+        input size. cancel_event is checked between steps and chunks.
+        """
+        log = log or (lambda line: None)
+
+        def check_cancelled() -> None:
+            if cancel_event is not None and cancel_event.is_set():
+                raise PipelineCancelled("Job was cancelled")
+
+        started = time.monotonic()
+        Pipeline.validate(steps, len(input_files))
+        mode = Pipeline.choose_mode(steps, input_files, mode)
+
+        needed, pushed, remaining = Pipeline.plan(steps)
+        columns = None
+        if needed is not None:
+            header = list(pd.read_csv(input_files[0], nrows=0).columns)
+            columns = [col for col in header if col in needed]
+            log(f"Reading columns {columns} of {os.path.basename(input_files[0])}")
+        if pushed:
+            log(f"Applying {len(pushed)} filter(s) while reading")
+
+        if mode == "streaming":
+            log(f"Streaming in chunks of {chunk_rows} rows")
+            df = _run_streaming(input_files, output_path, columns, pushed, remaining,
+                                chunk_rows, log, check_cancelled, compression)
+        else:
+            df = Pipeline.read_input(input_files[0], columns, pushed)
+            log(f"Read {len(df)} rows")
+            df = _apply_steps(df, remaining, input_files, log, check_cancelled)
+
+        if df is not None:
+            check_cancelled()
+            df.to_csv(output_path, index=False, compression=compression)
+            rows, result_columns = len(df), list(df.columns)
+        else:
+            rows, result_columns = None, None
+        log(f"Wrote {rows if rows is not None else 'all'} rows")
+        return {
+            "mode": mode,
+            "rows": rows,
+            "columns": result_columns,
+            "wall_time": round(time.monotonic() - started, 3)
+        }
+
+
+def _apply_steps(df: pd.DataFrame, steps: List[Dict[str, Any]], input_files: List[str],
+                 log: Callable[[str], None], check_cancelled: Callable[[], None]) -> pd.DataFrame:
+    for step in steps:
+        check_cancelled()
+        df = _STEPS[step["op"]](df, step, input_files)
+        log(f"{step['op']}: {len(df)} rows, {len(df.columns)} columns")
+    return df
+
+
+def _run_streaming(input_files: List[str], output_path: str, columns: Optional[List[str]],
+                   pushed: List[Dict[str, Any]], steps: List[Dict[str, Any]], chunk_rows: int,
+                   log: Callable[[str], None], check_cancelled: Callable[[], None],
+                   compression: Optional[str] = "infer") -> Optional[pd.DataFrame]:
+    """Stream the input through row-wise steps.
+
+    Returns the aggregated frame, with the steps after the groupby applied,
+    for the caller to write; without a groupby the rows are appended to
+    output_path directly and None is returned.
+    """
+    split = next((i for i, step in enumerate(steps) if step["op"] == "groupby"), len(steps))
+    row_steps, groupby, post_steps = steps[:split], steps[split:split + 1], steps[split + 1:]
+    aggregator = _GroupAggregator(groupby[0]) if groupby else None
+
+    rows_in = rows_out = 0
+    with open_csv(output_path, 'w', compression) as out:
+        header_written = False
+        for chunk in Pipeline.iter_input(input_files[0], columns, pushed, chunk_rows):
+            check_cancelled()
+            rows_in += len(chunk)
+            for step in row_steps:
+                chunk = _STEPS[step["op"]](chunk, step, input_files)
+            if aggregator is not None:
+                aggregator.update(chunk)
+                continue
+            chunk.to_csv(out, header=not header_written, index=False)
+            header_written = True
+            rows_out += len(chunk)
+
+        if aggregator is None and not header_written:
+            empty = pd.read_csv(input_files[0], usecols=columns, nrows=0)
+            for step in row_steps:
+                empty = _STEPS[step["op"]](empty, step, input_files)
+            empty.to_csv(out, index=False)
+
+    log(f"Streamed {rows_in} matching rows")
+    if aggregator is None:
+        log(f"Appended {rows_out} rows to the output")
+        return None
+
+    df = aggregator.result()
+    log(f"groupby: {len(df)} rows, {len(df.columns)} columns")
+    return _apply_steps(df, post_steps, input_files, log, check_cancelled)
+
+
+class _GroupAggregator:
+    """Per-group partial aggregates of a groupby step, merged chunk by chunk.
+
+    sum, count, min, max, first and last merge with themselves; mean keeps
+    sum and count; std keeps count, mean and the sum of squared deviations
+    (M2), merged with Chan's parallel update.
+    """
+
+    PARTIALS = {
+        "sum": ("sum",),
+        "count": ("count",),
+        "min": ("min",),
+        "max": ("max",),
+        "first": ("first",),
+        "last": ("last",),
+        "mean": ("sum", "count"),
+        "std": ("count", "mean", "m2"),
+    }
+
+    def __init__(self, step: Dict[str, Any]):
+        self.by = step["by"]
+        self.outputs = []
+        for column, aggs in step["aggregations"].items():
+            if isinstance(aggs, list):
+                self.outputs.extend((f"{column}_{agg}", column, agg) for agg in aggs)
+            else:
+                self.outputs.append((column, column, aggs))
+        self.partials = sorted({
+            (column, stat) for _, column, agg in self.outputs for stat in self.PARTIALS[agg]
+        })
+        self.state: Optional[pd.DataFrame] = None
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        _check_columns(chunk, self.by + [column for _, column, _ in self.outputs])
+        grouped = chunk.groupby(self.by)
+        parts = {}
+        for column, stat in self.partials:
+            values = grouped[column]
+            if stat == "m2":
+                parts[(column, stat)] = (values.var(ddof=0) * values.count()).fillna(0.0)
+            else:
+                parts[(column, stat)] = getattr(values, stat)()
+        partial = pd.DataFrame(parts)
+        self.state = partial if self.state is None else self._merge(pd.concat([self.state, partial]))
+
+    def _merge(self, frame: pd.DataFrame) -> pd.DataFrame:
+        levels = list(range(frame.index.nlevels))
+        merged = {}
+        for column, stat in self.partials:
+            if stat in ("mean", "m2"):
+                continue
+            grouped = frame[(column, stat)].groupby(level=levels)
+            merged[(column, stat)] = getattr(grouped, "sum" if stat == "count" else stat)()
+
+        for column in {column for column, stat in self.partials if stat == "m2"}:
+            count = frame[(column, "count")]
+            mean = frame[(column, "mean")].fillna(0.0)
+            total = merged[(column, "count")]
+            combined = (mean * count).groupby(level=levels).sum() / total.where(total > 0)
+            deviation = count * (mean - combined.reindex(frame.index).fillna(0.0)) ** 2
+            merged[(column, "mean")] = combined
+            merged[(column, "m2")] = (frame[(column, "m2")] + deviation).groupby(level=levels).sum()
+        return pd.DataFrame(merged)
+
+    def result(self) -> pd.DataFrame:
+        if self.state is None:
+            return pd.DataFrame(columns=self.by + [name for name, _, _ in self.outputs])
+        state = self.state
+        result = {}
+        for name, column, agg in self.outputs:
+            if agg == "mean":
+                result[name] = state[(column, "sum")] / state[(column, "count")].replace(0, float("nan"))
+            elif agg == "std":
+                count = state[(column, "count")]
+                result[name] = (state[(column, "m2")] / (count - 1).where(count > 1)) ** 0.5
+            else:
+                result[name] = state[(column, agg)]
+        return pd.DataFrame(result).reset_index()
+
+
+def _is_row_wise(step: Dict[str, Any]) -> bool:
+    return step["op"] in ("filter", "select") or (
+        step["op"] == "fillna" and step.get("strategy", "value") == "value"
+    )
+
+
+def _referenced_columns(step: Dict[str, Any]) -> Set[str]:
+    op = step["op"]
+    if op == "filter":
+        return {step["column"]}
+    if op == "sort":
+        return set(step["by"])
+    if op == "dedupe":
+        return set(step.get("subset") or [])
+    return set()
+
+
+def _require_columns(step: Dict[str, Any], key: str, required: bool = True) -> None:
+    value = step.get(key)
+    if value is None and not required:
+        return
+    if not isinstance(value, list) or not value or not all(isinstance(col, str) for col in value):
+        raise PipelineError(f"'{key}' must be a non-empty list of column names")
+
+
+def _validate_filter(step: Dict[str, Any], input_count: int) -> None:
+    if not isinstance(step.get("column"), str):
+        raise PipelineError("'column' is required")
+    if step.get("operator") not in OPERATORS:
+        raise PipelineError(f"'operator' must be one of {', '.join(OPERATORS)}")
+    if step["operator"] in ("in", "not in") and not isinstance(step.get("value"), list):
+        raise PipelineError("'value' must be a list")
+
+
+def _validate_groupby(step: Dict[str, Any], input_count: int) -> None:
+    _require_columns(step, "by")
+    aggregations = step.get("aggregations")
+    if not isinstance(aggregations, dict) or not aggregations:
+        raise PipelineError("'aggregations' must map columns to aggregations")
+    for column, aggs in aggregations.items():
+        for agg in aggs if isinstance(aggs, list) else [aggs]:
+            if agg not in AGGREGATIONS:
+                raise PipelineError(f"unknown aggregation {agg!r} for {column!r}")
+
+
+def _validate_input(step: Dict[str, Any], input_count: int) -> None:
+    other = step.get("input")
+    if other != "rest" and not (isinstance(other, int) and 0 < other < input_count):
+        raise PipelineError(f"'input' must be 'rest' or an input index between 1 and {input_count - 1}")
+
+
+def _validate_join(step: Dict[str, Any], input_count: int) -> None:
+    _require_columns(step, "on")
+    _validate_input(step, input_count)
+    if step.get("how", "inner") not in JOIN_TYPES:
+        raise PipelineError(f"'how' must be one of {', '.join(sorted(JOIN_TYPES))}")
+    if step.get("otherwise", "error") not in ("error", "concat"):
+        raise PipelineError("'otherwise' must be 'error' or 'concat'")
+
+
+def _validate_fillna(step: Dict[str, Any], input_count: int) -> None:
+    _require_columns(step, "columns", required=False)
+    strategy = step.get("strategy", "value")
+    if strategy not in FILL_STRATEGIES:
+        raise PipelineError(f"'strategy' must be one of {', '.join(sorted(FILL_STRATEGIES))}")
+    if strategy == "value" and "value" not in step:
+        raise PipelineError("'value' is required for the value strategy")
+
+
+def _validate_dedupe(step: Dict[str, Any], input_count: int) -> None:
+    _require_columns(step, "subset", required=False)
+    if step.get("keep", "first") not in ("first", "last"):
+        raise PipelineError("'keep' must be 'first' or 'last'")
+
+
+def _validate_sort(step: Dict[str, Any], input_count: int) -> None:
+    _require_columns(step, "by")
+
+
+_VALIDATORS = {
+    "filter": _validate_filter,
+    "select": lambda step, input_count: _require_columns(step, "columns"),
+    "groupby": _validate_groupby,
+    "join": _validate_join,
+    "concat": _validate_input,
+    "fillna": _validate_fillna,
+    "dedupe": _validate_dedupe,
+    "sort": _validate_sort,
+}
+
+
+def _check_columns(df: pd.DataFrame, columns: List[str]) -> None:
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise PipelineError(f"Unknown column(s): {', '.join(missing)}")
+
+
+def _apply_filters(df: pd.DataFrame, filters: List[Dict[str, Any]]) -> pd.DataFrame:
+    _check_columns(df, [step["column"] for step in filters])
+    mask = pd.Series(True, index=df.index)
+    for step in filters:
+        mask &= OPERATORS[step["operator"]](_plain(df[step["column"]]), step.get("value")).fillna(False).astype(bool)
+    return df[mask]
+
+
+def _select(df: pd.DataFrame, step: Dict[str, Any], input_files: List[str]) -> pd.DataFrame:
+    _check_columns(df, step["columns"])
+    return df[step["columns"]]
+
+
+def _groupby(df: pd.DataFrame, step: Dict[str, Any], input_files: List[str]) -> pd.DataFrame:
+    _check_columns(df, step["by"] + list(step["aggregations"]))
+    named = {}
+    for column, aggs in step["aggregations"].items():
+        if isinstance(aggs, list):
+            named.update({f"{column}_{agg}": (column, agg) for agg in aggs})
+        else:
+            named[column] = (column, aggs)
+    # Categorical keys (compact loads) group like the values they hold
+    return df.groupby(step["by"], observed=True).agg(**named).reset_index()
+
+
+def _other_inputs(step: Dict[str, Any], input_files: List[str]) -> List[int]:
+    return list(range(1, len(input_files))) if step["input"] == "rest" else [step["input"]]
+
+
+def _join(df: pd.DataFrame, step: Dict[str, Any], input_files: List[str]) -> pd.DataFrame:
+    for other in _other_inputs(step, input_files):
+        right = CSVAnalyzer.load_dataframe(input_files[other])
+        if step.get("otherwise") == "concat" and not (
+            set(step["on"]) <= set(df.columns) and set(step["on"]) <= set(right.columns)
+        ):
+            df = pd.concat([df, right], ignore_index=True)
+            continue
+        _check_columns(df, step["on"])
+        _check_columns(right, step["on"])
+        df = pd.merge(df, right, on=step["on"], how=step.get("how", "inner"))
+    return df
+
+
+def _concat(df: pd.DataFrame, step: Dict[str, Any], input_files: List[str]) -> pd.DataFrame:
+    others = [CSVAnalyzer.load_dataframe(input_files[other]) for other in _other_inputs(step, input_files)]
+    return pd.concat([df] + others, ignore_index=True) if others else df
+
+
+def _fillna(df: pd.DataFrame, step: Dict[str, Any], input_files: List[str]) -> pd.DataFrame:
+    columns = step.get("columns") or list(df.columns)
+    _check_columns(df, columns)
+    strategy = step.get("strategy", "value")
+
+    values = {}
+    for col in columns:
+        col_data = df[col]
+        numeric = pd.api.types.is_numeric_dtype(col_data) and not pd.api.types.is_bool_dtype(col_data)
+        if strategy == "value":
+            values[col] = step["value"]
+        elif strategy in ("mean", "median") and numeric:
+            values[col] = getattr(col_data, strategy)()
+        elif strategy == "mode" or (strategy == "auto" and not numeric):
+            mode = col_data.mode()
+            values[col] = mode[0] if not mode.empty else "Unknown"
+        elif strategy == "auto":
+            values[col] = col_data.mean()
+
+    # Compact dtypes may not hold the fill value: categoricals lack it as a
+    # category, small nullable integers cannot take fractions
+    widened = {}
+    for col, value in values.items():
+        col_data = df[col]
+        if isinstance(col_data.dtype, pd.CategoricalDtype) and value not in col_data.cat.categories:
+            widened[col] = col_data.cat.categories.dtype
+        elif pd.api.types.is_extension_array_dtype(col_data) and pd.api.types.is_integer_dtype(col_data) \
+                and not float(value).is_integer():
+            widened[col] = "float64"
+    if widened:
+        df = df.astype(widened)
+    return df.fillna(values)
+
+
+def _plain(values: pd.Series) -> pd.Series:
+    """Categorical values as their categories' dtype, so they compare like
+    the column a default read gives."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.astype(values.cat.categories.dtype)
+    return values
+
+
+def _dedupe(df: pd.DataFrame, step: Dict[str, Any], input_files: List[str]) -> pd.DataFrame:
+    if step.get("subset"):
+        _check_columns(df, step["subset"])
+    return df.drop_duplicates(subset=step.get("subset"), keep=step.get("keep", "first"))
+
+
+def _sort(df: pd.DataFrame, step: Dict[str, Any], input_files: List[str]) -> pd.DataFrame:
+    _check_columns(df, step["by"])
+    return df.sort_values(step["by"], ascending=step.get("ascending", True), kind="stable")
+
+
+_STEPS = {
+    "filter": lambda df, step, input_files: _apply_filters(df, [step]),
+    "select": _select,
+    "groupby": _groupby,
+    "join": _join,
+    "concat": _concat,
+    "fillna": _fillna,
+    "dedupe": _dedupe,
+    "sort": _sort,
+}
@@ -0,0 +1,169 @@
+import os
+import time
+import signal
+from typing import Dict, Any, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+# Default limits of a script job; 0 means unlimited. Jobs may ask for lower
+# limits but never for higher ones.
+SCRIPT_TIMEOUT = float(os.getenv("SCRIPT_TIMEOUT", 3600))
+SCRIPT_MAX_MEMORY = int(os.getenv("SCRIPT_MAX_MEMORY", 0))
+SCRIPT_MAX_CPU_SECONDS = int(os.getenv("SCRIPT_MAX_CPU_SECONDS", 0))
+# Seconds between SIGTERM and SIGKILL when a job runs out of time
+SCRIPT_KILL_GRACE = float(os.getenv("SCRIPT_KILL_GRACE", 5))
+# A cgroup v2 directory delegated to this service; each job then runs in its
+# own child cgroup with memory.max set
+SCRIPT_CGROUP_ROOT = os.getenv("SCRIPT_CGROUP_ROOT")
+
+DEFAULT_LIMITS = {
+    "timeout": SCRIPT_TIMEOUT,
+    "max_memory": SCRIPT_MAX_MEMORY,
+    "max_cpu_seconds": SCRIPT_MAX_CPU_SECONDS
+}
+
+
+def resolve_limits(requested: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Combine the limits a job asked for with the configured defaults."""
+    limits = dict(DEFAULT_LIMITS)
+    for name, value in (requested or {}).items():
+        if name in limits and value:
+            limits[name] = min(value, limits[name]) if limits[name] else value
+    return limits
+
+
+def apply_rlimits(limits: Dict[str, Any], pid: int = 0) -> None:
+    """Apply the memory and CPU limits to a process (0 for the calling one).
+
+    Memory is limited through RLIMIT_DATA, which covers the heap and
+    anonymous mappings but not memory-mapped input files.
+    """
+    if resource is None:
+        return
+    settings = []
+    if limits.get("max_memory"):
+        settings.append((resource.RLIMIT_DATA, (int(limits["max_memory"]),) * 2))
+    if limits.get("max_cpu_seconds"):
+        # SIGXCPU at the soft limit, SIGKILL a second later
+        cpu = int(limits["max_cpu_seconds"])
+        settings.append((resource.RLIMIT_CPU, (cpu, cpu + 1)))
+
+    for limit, values in settings:
+        if pid:
+            resource.prlimit(pid, limit, values)
+        else:
+            resource.setrlimit(limit, values)
+
+
+def has_exited(pid: int) -> bool:
+    """Whether a child has exited, without reaping it."""
+    return os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is not None
+
+
+def reap(pid: int) -> Dict[str, Any]:
+    """Wait for a child and return its exit code and resource usage.
+
+    I/O counters are read from /proc while the child is a zombie, so they
+    are only reported on Linux.
+    """
+    os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)
+    io = _read_proc_io(pid)
+    _, status, usage = os.wait4(pid, 0)
+    return {
+        "returncode": os.waitstatus_to_exitcode(status),
+        "cpu_user": usage.ru_utime,
+        "cpu_system": usage.ru_stime,
+        "max_rss": usage.ru_maxrss * 1024,
+        "read_bytes": io.get("rchar"),
+        "write_bytes": io.get("wchar")
+    }
+
+
+def _read_proc_io(pid: int) -> Dict[str, int]:
+    try:
+        with open(f"/proc/{pid}/io", 'r') as f:
+            return {name: int(value) for name, value in (line.split(":") for line in f)}
+    except (OSError, ValueError):
+        return {}
+
+
+class JobCgroup:
+    """Per-job cgroup v2 under SCRIPT_CGROUP_ROOT enforcing memory.max."""
+
+    def __init__(self, job_id: str, limits: Dict[str, Any], root: Optional[str] = SCRIPT_CGROUP_ROOT):
+        self.path = os.path.join(root, f"job-{job_id}")
+        os.makedirs(self.path, exist_ok=True)
+        if limits.get("max_memory"):
+            self._write("memory.max", str(int(limits["max_memory"])))
+            self._write("memory.swap.max", "0")
+
+    @staticmethod
+    def available(root: Optional[str] = SCRIPT_CGROUP_ROOT) -> bool:
+        return bool(root) and os.path.exists(os.path.join(root, "cgroup.procs")) and os.access(root, os.W_OK)
+
+    def add(self, pid: int) -> None:
+        self._write("cgroup.procs", str(pid))
+
+    def remove(self) -> None:
+        try:
+            os.rmdir(self.path)
+        except OSError:
+            pass
+
+    def _write(self, name: str, value: str) -> None:
+        try:
+            with open(os.path.join(self.path, name), 'w') as f:
+                f.write(value)
+        except FileNotFoundError:
+            # Controller not enabled for this subtree
+            pass
+
+
+class JobSupervisor:
+    """Enforces cancellation and the wall-clock limit of a running job.
+
+    check() is called periodically while the job runs. A job that runs out
+    of time gets SIGTERM and, if still running after SCRIPT_KILL_GRACE
+    seconds, SIGKILL; a cancelled job is killed right away.
+    """
+
+    def __init__(self, limits: Dict[str, Any], cancel_event=None, kill_grace: float = SCRIPT_KILL_GRACE):
+        self.limits = limits
+        self.cancel_event = cancel_event
+        self.kill_grace = kill_grace
+        self.started = time.monotonic()
+        self.pid: Optional[int] = None
+        self.timed_out = False
+        self._terminated_at: Optional[float] = None
+
+    def attach(self, pid: int) -> None:
+        """Start supervising pid; the time limit counts from here."""
+        self.pid = pid
+        self.started = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def check(self) -> None:
+        if self.pid is None:
+            return
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            self._signal(signal.SIGKILL)
+            return
+
+        timeout = self.limits.get("timeout")
+        if timeout and not self.timed_out and self.elapsed() > timeout:
+            self.timed_out = True
+            self._terminated_at = time.monotonic()
+            self._signal(signal.SIGTERM)
+        elif self._terminated_at is not None and time.monotonic() - self._terminated_at > self.kill_grace:
+            self._signal(signal.SIGKILL)
+
+    def _signal(self, signum: int) -> None:
+        try:
+            os.kill(self.pid, signum)
+        except ProcessLookupError:
+            pass
@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import threading
+from typing import Dict, List, Any, Optional
+import numpy as np
+import pandas as pd
+from services.compact_dtypes import COMPACT_LOAD
+
+# Outputs of successful script runs are kept under RESULT_CACHE_DIR, keyed by
+# everything that determines them, and evicted least recently used first
+# once they take more than RESULT_CACHE_BYTES.
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "backend/result_cache")
+RESULT_CACHE_BYTES = int(os.getenv("RESULT_CACHE_BYTES", 1024**3))
+
+# Interpreter and library versions scripts run against, and the dtypes they
+# load inputs with; a change invalidates every cached result
+RUNTIME_VERSION = (f"python {sys.version.split()[0]}; pandas {pd.__version__}; numpy {np.__version__}; "
+                   f"compact {COMPACT_LOAD}")
+
+
+def link_or_copy(source: str, target: str) -> None:
+    """Hardlink source to target, copying only across filesystems."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+class ResultCache:
+    """Content-addressed cache of script outputs.
+
+    Each entry is an output file ``<key>.out`` and its run's logs in
+    ``<key>.json``. Recency is tracked through the mtime of the logs file,
+    which is refreshed on every hit, so all server workers share one LRU
+    order. The output's own mtime is left alone: it is hardlinked into the
+    job outputs served from the cache.
+    """
+
+    def __init__(self, cache_dir: str = RESULT_CACHE_DIR, max_bytes: int = RESULT_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(script: str, input_files: List[Dict[str, str]], output_filename: str,
+            input_schema: Optional[Dict[str, Any]] = None) -> str:
+        """Hash a script run.
+
+        input_files lists the name each input is staged under (scripts can
+        see it) with the sha256 of its contents.
+        """
+        payload = json.dumps({
+            "script": script,
+            "inputs": input_files,
+            "output_filename": output_filename,
+            "input_schema": input_schema or {},
+            "runtime": RUNTIME_VERSION
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.out", f"{base}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return {"output_file", "logs"} for a cached run, or None."""
+        output_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r') as f:
+                entry = json.load(f)
+            os.utime(meta_path)
+        except (FileNotFoundError, ValueError):
+            return None
+        entry["output_file"] = output_path
+        return entry
+
+    def put(self, key: str, output_file: str, logs: List[str]) -> None:
+        """Store the output of a successful run and evict old entries."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        output_path, meta_path = self._paths(key)
+        tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        link_or_copy(output_file, tmp_path)
+        os.replace(tmp_path, output_path)
+
+        tmp_meta = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_meta, 'w') as f:
+            json.dump({"logs": list(logs)}, f)
+        os.replace(tmp_meta, meta_path)
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used entries until the cache fits its budget."""
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".out"):
+                    continue
+                key = name[:-len(".out")]
+                output_path, meta_path = self._paths(key)
+                try:
+                    stats = os.stat(output_path)
+                except FileNotFoundError:
+                    continue
+                try:
+                    used = os.stat(meta_path).st_mtime
+                except FileNotFoundError:
+                    # Entry still being written
+                    used = stats.st_mtime
+                entries.append((used, stats.st_size, key))
+                total += stats.st_size
+
+            for _, size, key in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self.remove(key)
+                total -= size
+
+    def remove(self, key: str) -> None:
+        # Logs first, so get() stops finding the entry before its output goes
+        for path in reversed(self._paths(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+# Shared by the scripts router
+result_cache = ResultCache()
@@ -0,0 +1,213 @@
+import os
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+import pandas as pd
+from services.compression import compression_of, open_csv
+
+# A byte offset is kept for every ROW_INDEX_STRIDE-th row
+ROW_INDEX_STRIDE = int(os.getenv("ROW_INDEX_STRIDE", 10_000))
+SCAN_CHUNK_SIZE = 4 * 1024 * 1024
+# Stored indexes of an older format are rebuilt; format 2 skips blank lines
+INDEX_FORMAT = 2
+
+_NEWLINE = ord('\n')
+_QUOTE = ord('"')
+# Records made only of these are blank lines, which pandas skips
+_BLANK = np.frombuffer(b' \t\r\n', dtype=np.uint8)
+
+
+class RowIndexBuilder:
+    """Incrementally find record boundaries in CSV bytes fed chunk by chunk.
+
+    A newline ends a record only when it is outside a quoted field, which is
+    tracked by the parity of the quote characters seen so far (escaped quotes
+    come in pairs and do not change it). Blank records, empty or only
+    whitespace, are not counted, as pandas skips them (skip_blank_lines).
+    """
+
+    def __init__(self, stride: int = ROW_INDEX_STRIDE):
+        self.stride = stride
+        self.position = 0
+        self.quote_count = 0
+        self.header_end: Optional[int] = None
+        self.rows = 0
+        self.offsets = []
+        self.last_boundary = 0
+        # Whether the record still open at the end of the data so far has
+        # anything but whitespace
+        self.open_content = False
+
+    def feed(self, chunk: bytes) -> None:
+        data = np.frombuffer(chunk, dtype=np.uint8)
+        quotes = np.flatnonzero(data == _QUOTE)
+        newlines = np.flatnonzero(data == _NEWLINE)
+
+        content = np.flatnonzero(~np.isin(data, _BLANK))
+
+        quotes_before = np.searchsorted(quotes, newlines) + self.quote_count
+        ends = newlines[quotes_before % 2 == 0]
+        # Records ending in this chunk start after the previous end; the
+        # first started earlier, its content so far is in open_content
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        has_content = np.searchsorted(content, ends) > np.searchsorted(content, starts)
+        if len(ends):
+            has_content[0] |= self.open_content
+            self.open_content = bool(len(content)) and content[-1] > ends[-1]
+        else:
+            self.open_content |= bool(len(content))
+        boundaries = ends[has_content] + self.position + 1
+
+        self.quote_count += len(quotes)
+        self.position += len(data)
+        if len(boundaries) == 0:
+            return
+
+        self.last_boundary = int(boundaries[-1])
+        if self.header_end is None:
+            self.header_end = int(boundaries[0])
+            self.offsets.append(self.header_end)
+            boundaries = boundaries[1:]
+
+        # Boundary i starts record number rows + i + 1
+        record_numbers = np.arange(self.rows + 1, self.rows + 1 + len(boundaries))
+        self.offsets.extend(int(b) for b in boundaries[record_numbers % self.stride == 0])
+        self.rows += len(boundaries)
+
+    def finish(self) -> Dict[str, Any]:
+        if self.header_end is None:
+            self.header_end = self.position
+            self.offsets.append(self.position)
+        elif self.open_content:
+            # Last record without a trailing newline
+            self.rows += 1
+
+        # Drop offsets of records past the last one, which point at the end
+        # of the file or at trailing blank lines
+        offsets = self.offsets[:1] + [
+            offset for k, offset in enumerate(self.offsets[1:], 1) if k * self.stride < self.rows
+        ]
+        return {
+            "offsets": np.asarray(offsets, dtype=np.int64),
+            "rows": self.rows,
+            "stride": self.stride,
+            "length": self.position,
+            "format": INDEX_FORMAT
+        }
+
+
+class RowIndex:
+    """Sparse byte-offset index over the records of a CSV file.
+
+    Stored next to the CSV as ``.<csv name>.rowidx.npz`` together with the
+    mtime and size of the file it was built for. It gives the exact row count
+    and lets a preview page be parsed by seeking to the nearest indexed row.
+    Offsets of compressed files are into their decompressed data.
+    """
+
+    @staticmethod
+    def index_path(csv_path: str) -> str:
+        directory, name = os.path.split(csv_path)
+        return os.path.join(directory, f".{name}.rowidx.npz")
+
+    @staticmethod
+    def build(csv_path: str, stride: int = ROW_INDEX_STRIDE) -> Dict[str, Any]:
+        """Scan a CSV file and store its row index."""
+        builder = RowIndexBuilder(stride)
+        with open_csv(csv_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(SCAN_CHUNK_SIZE), b''):
+                builder.feed(chunk)
+        return RowIndex.save(csv_path, builder.finish())
+
+    @staticmethod
+    def save(csv_path: str, index: Dict[str, Any]) -> Dict[str, Any]:
+        """Store an index built for the current version of csv_path."""
+        file_stats = os.stat(csv_path)
+        index = dict(index, mtime=file_stats.st_mtime, size=file_stats.st_size)
+
+        path = RowIndex.index_path(csv_path)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **index)
+        os.replace(tmp_path, path)
+        return index
+
+    @staticmethod
+    def load(csv_path: str) -> Optional[Dict[str, Any]]:
+        """Return the stored index if it matches the current file version."""
+        try:
+            with np.load(RowIndex.index_path(csv_path)) as data:
+                index = {key: data[key] for key in data.files}
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+        file_stats = os.stat(csv_path)
+        if float(index["mtime"]) != file_stats.st_mtime or int(index["size"]) != file_stats.st_size:
+            return None
+        if int(index.get("format", 1)) != INDEX_FORMAT:
+            return None
+        index["rows"] = int(index["rows"])
+        index["stride"] = int(index["stride"])
+        # Indexes of plain files predating "length" cover the whole file
+        index["length"] = int(index.get("length", file_stats.st_size))
+        return index
+
+    @staticmethod
+    def get_or_build(csv_path: str) -> Dict[str, Any]:
+        index = RowIndex.load(csv_path)
+        if index is None:
+            index = RowIndex.build(csv_path)
+        return index
+
+    @staticmethod
+    def estimate_rows(csv_path: str, sample_bytes: int = SCAN_CHUNK_SIZE) -> Tuple[int, bool]:
+        """Estimate the row count from the head of the file.
+
+        Returns (rows, exact); the count is exact when the sample covers the
+        whole file, otherwise it is extrapolated from the average row size.
+        """
+        if compression_of(csv_path):
+            # The decompressed size is unknown until the data is decoded
+            return RowIndex.get_or_build(csv_path)["rows"], True
+
+        size = os.path.getsize(csv_path)
+        builder = RowIndexBuilder()
+        with open(csv_path, 'rb') as f:
+            builder.feed(f.read(sample_bytes))
+        if builder.position >= size:
+            return builder.finish()["rows"], True
+
+        sampled_bytes = builder.last_boundary - (builder.header_end or 0)
+        if builder.rows == 0 or sampled_bytes <= 0:
+            return 0, False
+        return int(round(builder.rows * (size - builder.header_end) / sampled_bytes)), False
+
+    @staticmethod
+    def read_rows(csv_path: str, offset: int, limit: int,
+                  dtype: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Parse only rows [offset, offset + limit) of a CSV file."""
+        index = RowIndex.get_or_build(csv_path)
+        headers = list(pd.read_csv(csv_path, nrows=0).columns)
+        if offset >= index["rows"] or limit <= 0:
+            return pd.DataFrame(columns=headers)
+
+        block = min(offset // index["stride"], len(index["offsets"]) - 1)
+        skip = offset - block * index["stride"]
+        with open_csv(csv_path, 'rb') as f:
+            f.seek(int(index["offsets"][block]))
+            df = pd.read_csv(f, header=None, names=headers, nrows=skip + limit, dtype=dtype)
+        return df.iloc[skip:].reset_index(drop=True)
+
+    @staticmethod
+    def data_size(csv_path: str) -> int:
+        """Bytes of CSV text in a file, decompressed; compressed files are
+        indexed to find out."""
+        if compression_of(csv_path) is None:
+            return os.path.getsize(csv_path)
+        return RowIndex.get_or_build(csv_path)["length"]
+
+    @staticmethod
+    def remove(csv_path: str) -> None:
+        """Delete the stored index of a CSV file."""
+        path = RowIndex.index_path(csv_path)
+        if os.path.exists(path):
+            os.remove(path)
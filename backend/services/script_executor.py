@@ -1,35 +1,191 @@
 import subprocess
 import tempfile
 import os
+import time
 import json
+import signal
 import sys
-from typing import List, Dict, Any
+import threading
+import shutil
+import errno
+import stat
+import inspect
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional, Callable
 import pandas as pd
 from datetime import datetime
 import uuid
+from services.columnar_store import ColumnarStore
+from services.compact_dtypes import COMPACT_LOAD
+from services.compression import compression_of, compress_file, without_compression
+from services.csv_engines import CSV_ENGINE, read_csv_arrow
+from services.csv_analyzer import CSVAnalyzer
+from services.interpreter_pool import interpreter_pool
+from services.job_logs import OutputTail, JOB_LOG_RING_SIZE
+from services.partitions import Partitioner, PARALLELISM
+from services.pipeline import Pipeline, PipelineCancelled
+from services.resource_limits import resolve_limits, apply_rlimits, has_exited, reap, JobCgroup, JobSupervisor
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# Seconds between checks for cancellation and new output while a script runs
+CANCEL_POLL_INTERVAL = 0.2
+
+# Trailing stderr lines reported as the error of a failed job
+ERROR_TAIL_LINES = 50
+
+# Scratch directories for running scripts; kept on the same filesystem as
+# uploads and outputs so staging and collecting files needs no data copies.
+WORK_DIR = os.getenv("SCRIPT_WORK_DIR", "backend/work")
+
+# Linux ioctl for copy-on-write clones (btrfs, XFS)
+FICLONE = 0x40049409
+
+# Scripts write their output here, relative to their working directory, so
+# it can never be an input staged under the same name
+OUTPUT_SUBDIR = "output"
+
+# Defines the lazy `dataframes` mapping in the generated script. Files are
+# parsed on first access, restricted to the declared columns/dtypes, and read
+# from a staged columnar sidecar when there is one.
+LAZY_DATAFRAMES_SOURCE = '''
+from collections.abc import Mapping
+
+class LazyDataFrames(Mapping):
+    def __init__(self, files, schema):
+        self._files = list(files)
+        self._schema = schema
+        self._frames = {}
+
+    def __getitem__(self, file):
+        if file not in self._frames:
+            if file not in self._files:
+                raise KeyError(file)
+            hints = self._schema.get(file, {})
+            self._frames[file] = self.load(file, hints.get("columns"), hints.get("dtypes"),
+                                           hints.get("parse_dates"), hints.get("date_format"))
+        return self._frames[file]
+
+    def __iter__(self):
+        return iter(self._files)
+
+    def __len__(self):
+        return len(self._files)
+
+    def __repr__(self):
+        loaded = [file for file in self._files if file in self._frames]
+        return f"LazyDataFrames(files={self._files!r}, loaded={loaded!r})"
+
+    def load(self, file, columns=None, dtype=None, parse_dates=None, date_format=None):
+        """Read a file (optionally only some columns) without caching it."""
+        sidecar = f".{file}.arrow"
+        if os.path.exists(sidecar):
+            try:
+                import pyarrow.feather as feather
+                df = feather.read_table(sidecar, columns=columns, memory_map=True).to_pandas()
+                df = df.astype(dtype) if dtype else df
+                return self._parse_dates(df, parse_dates, date_format)
+            except ImportError:
+                pass
+        if csv_engine != "c":
+            try:
+                df = read_csv_arrow(file, columns, dtype)
+                if df is not None:
+                    return self._parse_dates(df, parse_dates, date_format)
+            except ImportError:
+                pass
+        return pd.read_csv(file, usecols=columns, dtype=dtype, parse_dates=parse_dates, date_format=date_format)
+
+    @staticmethod
+    def _parse_dates(df, parse_dates, date_format):
+        for col in parse_dates or []:
+            df[col] = pd.to_datetime(df[col], format=(date_format or {}).get(col))
+        return df
+'''
+
+# Multi-threaded Arrow parsing for the preamble; scripts use it for both
+# the pyarrow and parallel engines instead of starting a process pool of
+# their own.
+ARROW_READER_SOURCE = inspect.getsource(read_csv_arrow)
 
 class ScriptExecutor:
     @staticmethod
-    def execute_script(script_content: str, input_files: List[str], output_filename: str) -> Dict[str, Any]:
-        """Execute Python script with provided CSV files."""
-        job_id = str(uuid.uuid4())
-        logs = []
+    def execute_script(script_content: str, input_files: List[str], output_filename: str,
+                       job_id: Optional[str] = None,
+                       cancel_event: Optional[threading.Event] = None,
+                       input_schema: Optional[Dict[str, Dict[str, Any]]] = None,
+                       on_log: Optional[Callable[[str], None]] = None,
+                       limits: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Execute Python script with provided CSV files.
+
+        input_schema optionally maps an input file to the columns and dtypes
+        the script needs, so only those are parsed; with infer_types the
+        types inferred when the file was profiled are applied as well, with
+        compact (or COMPACT_LOAD) the compact dtypes planned from it. If
+        cancel_event is set while the script runs, the process is killed and
+        the job is reported as cancelled. on_log is called with every log
+        line as it is produced, including script output while the script is
+        still running.
+
+        limits may lower the configured timeout, max_memory and
+        max_cpu_seconds of the job. The resources the script used are
+        reported under "resources" in the result.
+        """
+        job_id = job_id or str(uuid.uuid4())
+        limits = resolve_limits(limits)
+        resources = None
+        logs = deque(maxlen=JOB_LOG_RING_SIZE)
+        stderr_tail = deque(maxlen=ERROR_TAIL_LINES)
+        
+        def log(line: str) -> None:
+            logs.append(line)
+            if on_log is not None:
+                on_log(line)
+        
+        def log_stderr(line: str) -> None:
+            stderr_tail.append(line)
+            log(f"ERROR: {line}")
         
         try:
-            # Create temporary directory for execution
-            with tempfile.TemporaryDirectory() as temp_dir:
-                logs.append(f"Created temporary directory: {temp_dir}")
+            # Create temporary directory for execution next to the uploads so
+            # inputs can be hardlinked and outputs renamed into place
+            os.makedirs(WORK_DIR, exist_ok=True)
+            with tempfile.TemporaryDirectory(dir=os.path.abspath(WORK_DIR)) as temp_dir:
+                log(f"Created temporary directory: {temp_dir}")
                 
-                # Copy input files to temp directory
+                # Stage input files in the temp directory without copying data
+                # where they can be protected from writes
                 input_paths = []
                 for file_path in input_files:
                     if os.path.exists(file_path):
                         filename = os.path.basename(file_path)
                         temp_file_path = os.path.join(temp_dir, filename)
-                        os.makedirs(os.path.dirname(temp_file_path), exist_ok=True)
-                        os.system(f'cp "{file_path}" "{temp_file_path}"')
+                        method = ScriptExecutor._stage_file(file_path, temp_file_path)
                         input_paths.append(temp_file_path)
-                        logs.append(f"Copied input file: {filename}")
+                        log(f"Staged input file: {filename} ({method})")
+                        
+                        sidecar = ColumnarStore.fresh_sidecar(file_path)
+                        if sidecar:
+                            ScriptExecutor._stage_file(sidecar, ColumnarStore.sidecar_path(temp_file_path))
+                
+                # Column/dtype hints keyed by the staged file name
+                schema = {}
+                schema_hints = dict(input_schema or {})
+                if COMPACT_LOAD:
+                    for file_path in input_files:
+                        schema_hints.setdefault(file_path, {})
+                for file_path, hints in schema_hints.items():
+                    hints = {k: v for k, v in hints.items() if v is not None}
+                    compact = hints.pop("compact", False) or COMPACT_LOAD
+                    if hints.pop("infer_types", False):
+                        hints = ScriptExecutor._with_inferred_types(file_path, hints)
+                    if compact:
+                        hints = ScriptExecutor._with_compact_dtypes(file_path, hints)
+                    schema[os.path.basename(file_path)] = hints
                 
                 # Create the script file
                 script_path = os.path.join(temp_dir, "script.py")
@@ -44,17 +200,19 @@ import sys
 
 # Setup paths
 input_files = {json.dumps([os.path.basename(f) for f in input_paths])}
-output_filename = "{output_filename}"
+output_filename = "{OUTPUT_SUBDIR}/{output_filename}"
 
-# Load CSV files
-dataframes = {{}}
-for file in input_files:
-    if os.path.exists(file):
-        dataframes[file] = pd.read_csv(file)
+csv_engine = "{CSV_ENGINE}"
+{ARROW_READER_SOURCE}
+{LAZY_DATAFRAMES_SOURCE}
+input_schema = {json.dumps(schema)}
+dataframes = LazyDataFrames([file for file in input_files if os.path.exists(file)], input_schema)
 
 # Available variables:
-# - dataframes: dict mapping filename to pandas DataFrame
-# - output_filename: string for output file name
+# - dataframes: mapping of filename to pandas DataFrame, parsed on first access
+#   (dataframes.load(file, columns=[...], dtype={...}) reads a projection)
+# - output_filename: string for output file name; a .gz or .zst suffix means
+#   the output is written compressed, as to_csv infers from the name
 
 {script_content}
 
@@ -67,29 +225,43 @@ else:
 """
                     f.write(enhanced_script)
                 
-                logs.append("Script file created")
+                log("Script file created")
                 
                 # Execute the script
-                output_file = os.path.join(temp_dir, output_filename)
-                result = subprocess.run(
-                    [sys.executable, script_path],
-                    capture_output=True,
-                    text=True,
-                    cwd=temp_dir
-                )
+                output_file = os.path.join(temp_dir, OUTPUT_SUBDIR, output_filename)
+                os.makedirs(os.path.dirname(output_file))
+                resources = ScriptExecutor._run_process(script_path, temp_dir, job_id, limits, cancel_event,
+                                                        on_stdout=log, on_stderr=log_stderr)
+                returncode = resources.pop("returncode")
                 
-                logs.extend(result.stdout.strip().split('\n') if result.stdout.strip() else [])
+                if resources.pop("timed_out"):
+                    return {
+                        "job_id": job_id,
+                        "status": "failed",
+                        "logs": list(logs),
+                        "error": f"Job exceeded its time limit of {limits['timeout']:g} seconds",
+                        "output_file": None,
+                        "resources": resources
+                    }
                 
-                if result.stderr:
-                    logs.extend([f"ERROR: {line}" for line in result.stderr.strip().split('\n')])
+                if cancel_event is not None and cancel_event.is_set():
+                    return {
+                        "job_id": job_id,
+                        "status": "cancelled",
+                        "logs": list(logs),
+                        "error": "Job was cancelled",
+                        "output_file": None,
+                        "resources": resources
+                    }
                 
-                if result.returncode != 0:
+                if returncode != 0:
                     return {
                         "job_id": job_id,
                         "status": "failed",
-                        "logs": logs,
-                        "error": result.stderr,
-                        "output_file": None
+                        "logs": list(logs),
+                        "error": "\n".join(stderr_tail) or ScriptExecutor._exit_reason(returncode),
+                        "output_file": None,
+                        "resources": resources
                     }
                 
                 # Check if output file was created
@@ -98,38 +270,368 @@ else:
                     output_dir = "backend/outputs"
                     os.makedirs(output_dir, exist_ok=True)
                     final_output = os.path.join(output_dir, f"{job_id}_{output_filename}")
-                    os.system(f'cp "{output_file}" "{final_output}"')
+                    ScriptExecutor._move_file(output_file, final_output)
                     
-                    logs.append(f"Output file created: {final_output}")
+                    log(f"Output file created: {final_output}")
                     
                     return {
                         "job_id": job_id,
                         "status": "completed",
-                        "logs": logs,
+                        "logs": list(logs),
                         "output_file": final_output,
-                        "error": None
+                        "error": None,
+                        "resources": resources
                     }
                 else:
                     return {
                         "job_id": job_id,
                         "status": "failed",
-                        "logs": logs,
+                        "logs": list(logs),
                         "error": "Output file was not created",
-                        "output_file": None
+                        "output_file": None,
+                        "resources": resources
                     }
                     
         except Exception as e:
             return {
                 "job_id": job_id,
                 "status": "failed",
-                "logs": logs,
+                "logs": list(logs),
+                "error": str(e),
+                "output_file": None,
+                "resources": resources
+            }
+    
+    @staticmethod
+    def execute_partitioned(script_content: str, input_files: List[str], output_filename: str,
+                            partition: Dict[str, Any],
+                            job_id: Optional[str] = None,
+                            cancel_event: Optional[threading.Event] = None,
+                            input_schema: Optional[Dict[str, Dict[str, Any]]] = None,
+                            on_log: Optional[Callable[[str], None]] = None,
+                            limits: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Execute a script once per partition of its inputs, in parallel.
+
+        partition holds "by" ("file" or "rows"), the number of row ranges
+        under "partitions" and optional "reduce" pipeline steps. Every
+        partition runs in its own process, up to SCRIPT_PARALLELISM at a
+        time, with the job's limits applying to each. Partition outputs are
+        concatenated and, when reduce steps are given, passed through them.
+        The first failing partition cancels the others and fails the job.
+        """
+        job_id = job_id or str(uuid.uuid4())
+        started = time.monotonic()
+        logs = deque(maxlen=JOB_LOG_RING_SIZE)
+        # Set on cancellation of the job or failure of a partition
+        stop = threading.Event()
+        # Partition outputs stay plain until they are combined
+        part_filename = without_compression(output_filename)
+        
+        def log(line: str) -> None:
+            logs.append(line)
+            if on_log is not None:
+                on_log(line)
+        
+        def run_partition(i: int, files: List[str]) -> Dict[str, Any]:
+            if stop.is_set():
+                return {"status": "cancelled", "output_file": None, "error": None, "resources": None}
+            result = ScriptExecutor.execute_script(
+                script_content, files, part_filename,
+                job_id=f"{job_id}-p{i}",
+                cancel_event=stop,
+                input_schema=input_schema,
+                on_log=lambda line: log(f"[{i}] {line}"),
+                limits=limits
+            )
+            if result["status"] != "completed":
+                stop.set()
+            return result
+        
+        results = []
+        try:
+            os.makedirs(WORK_DIR, exist_ok=True)
+            with tempfile.TemporaryDirectory(dir=os.path.abspath(WORK_DIR)) as temp_dir:
+                partitions = Partitioner.plan(partition, input_files, temp_dir)
+                workers = min(PARALLELISM, len(partitions))
+                log(f"Running {len(partitions)} partition(s) by {partition['by']} on {workers} worker(s)")
+                
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(run_partition, i, files) for i, files in enumerate(partitions)]
+                    pending = set(futures)
+                    while pending:
+                        _, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL)
+                        if cancel_event is not None and cancel_event.is_set():
+                            stop.set()
+                    results = [future.result() for future in futures]
+                
+                resources = ScriptExecutor._combine_resources(results, started, workers)
+                outputs = [result["output_file"] for result in results]
+                failed = next(
+                    ((i, result) for i, result in enumerate(results) if result["status"] == "failed"),
+                    None
+                )
+                if cancel_event is not None and cancel_event.is_set():
+                    status, error = "cancelled", "Job was cancelled"
+                elif failed is not None:
+                    status, error = "failed", f"Partition {failed[0]} failed: {failed[1]['error']}"
+                else:
+                    status, error = "completed", None
+                
+                final_output = None
+                if status == "completed":
+                    combined = os.path.join(temp_dir, part_filename)
+                    Partitioner.concat(outputs, combined)
+                    if partition.get("reduce"):
+                        reduced = os.path.join(temp_dir, f"reduced_{part_filename}")
+                        Pipeline.run(partition["reduce"], [combined], reduced, log=log, cancel_event=cancel_event)
+                        combined = reduced
+                    if compression_of(output_filename):
+                        compressed = os.path.join(temp_dir, output_filename)
+                        compress_file(combined, compressed, compression_of(output_filename))
+                        combined = compressed
+                    
+                    output_dir = "backend/outputs"
+                    os.makedirs(output_dir, exist_ok=True)
+                    final_output = os.path.join(output_dir, f"{job_id}_{output_filename}")
+                    ScriptExecutor._move_file(combined, final_output)
+                    log(f"Output file created: {final_output}")
+                
+                return {
+                    "job_id": job_id,
+                    "status": status,
+                    "logs": list(logs),
+                    "output_file": final_output,
+                    "error": error,
+                    "resources": resources
+                }
+        
+        except Exception as e:
+            return {
+                "job_id": job_id,
+                "status": "cancelled" if isinstance(e, PipelineCancelled) else "failed",
+                "logs": list(logs),
                 "error": str(e),
-                "output_file": None
+                "output_file": None,
+                "resources": ScriptExecutor._combine_resources(results, started, None) if results else None
             }
+        finally:
+            for result in results:
+                if result["output_file"] and os.path.exists(result["output_file"]):
+                    os.remove(result["output_file"])
+    
+    @staticmethod
+    def _combine_resources(results: List[Dict[str, Any]], started: float,
+                           workers: Optional[int]) -> Dict[str, Any]:
+        """Total resource usage of the partitions of a job."""
+        usages = [result["resources"] for result in results if result["resources"]]
+        
+        def total(name: str) -> Optional[int]:
+            values = [usage[name] for usage in usages if usage.get(name) is not None]
+            return sum(values) if values else None
+        
+        max_rss = [usage["max_rss"] for usage in usages if usage.get("max_rss") is not None]
+        return {
+            "wall_time": round(time.monotonic() - started, 3),
+            "cpu_seconds": round(total("cpu_seconds") or 0, 3),
+            "max_rss": max(max_rss) if max_rss else None,
+            "read_bytes": total("read_bytes"),
+            "write_bytes": total("write_bytes"),
+            "partitions": len(results),
+            "workers": workers,
+            "limits": usages[0]["limits"] if usages else None
+        }
+    
+    @staticmethod
+    def _with_inferred_types(file_path: str, hints: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the read hints of a file's inferred types to a script's
+        hints for it; dtypes given by the caller take precedence."""
+        inferred = CSVAnalyzer.read_hints(file_path, hints.get("columns"))
+        if not inferred:
+            return hints
+        dtypes = dict(inferred["dtype"], **hints.get("dtypes", {}))
+        parse_dates = [col for col in inferred["parse_dates"] if col not in hints.get("dtypes", {})]
+        return dict(
+            hints,
+            dtypes=dtypes,
+            parse_dates=parse_dates,
+            date_format={col: inferred["date_format"][col] for col in parse_dates}
+        )
+    
+    @staticmethod
+    def _with_compact_dtypes(file_path: str, hints: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the compact dtypes planned from a file's profile for columns
+        the hints leave alone; parsed dates stay datetimes."""
+        plan = CSVAnalyzer.compact_plan(file_path, hints.get("columns"))
+        if not plan:
+            return hints
+        dtypes = hints.get("dtypes", {})
+        parse_dates = hints.get("parse_dates") or []
+        compact = {col: dtype for col, dtype in plan.items() if col not in parse_dates}
+        return dict(hints, dtypes=dict(compact, **dtypes))
+    
+    @staticmethod
+    def _exit_reason(returncode: int) -> str:
+        if returncode < 0:
+            try:
+                return f"Script was killed by {signal.Signals(-returncode).name}"
+            except ValueError:
+                return f"Script was killed by signal {-returncode}"
+        return f"Script exited with code {returncode}"
+    
+    @staticmethod
+    def _stage_file(source: str, target: str) -> str:
+        """Make source available at target as cheaply as possible, without
+        letting a script that writes to target change source.
+
+        Tries a copy-on-write reflink, which the script owns outright. A
+        hardlink or symlink shares source's inode, so it is only used once
+        source is read-only and the script cannot override that, i.e. it
+        does not run as root. The data is copied as a last resort. Returns
+        the method used.
+        """
+        if fcntl is not None:
+            try:
+                with open(source, 'rb') as src, open(target, 'wb') as dst:
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return "reflink"
+            except OSError:
+                if os.path.exists(target):
+                    os.remove(target)
+        
+        if getattr(os, "geteuid", lambda: None)() != 0:
+            mode = stat.S_IMODE(os.stat(source).st_mode)
+            if mode & 0o222:
+                os.chmod(source, mode & ~0o222)
+            try:
+                os.link(source, target)
+                return "hardlink"
+            except OSError:
+                pass
+            try:
+                os.symlink(os.path.abspath(source), target)
+                return "symlink"
+            except OSError:
+                pass
+        
+        # shutil uses os.sendfile where the platform supports it
+        shutil.copyfile(source, target)
+        return "copy"
+    
+    @staticmethod
+    def _move_file(source: str, target: str) -> None:
+        """Atomically move source to target, copying across filesystems."""
+        try:
+            os.replace(source, target)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            tmp_target = f"{target}.tmp"
+            shutil.copyfile(source, tmp_target)
+            os.replace(tmp_target, target)
+    
+    @staticmethod
+    def _run_process(script_path: str, cwd: str, job_id: str, limits: Dict[str, Any],
+                     cancel_event: Optional[threading.Event] = None,
+                     on_stdout: Optional[Callable[[str], None]] = None,
+                     on_stderr: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Run a script file under the given limits.
+
+        stdout and stderr go to files that are tailed while the script runs,
+        so each line reaches on_stdout/on_stderr shortly after it is written
+        instead of after the process exits. Uses a pre-warmed interpreter when
+        available, otherwise spawns a fresh Python process. Returns the exit
+        code, whether the job ran out of time, and its measured CPU seconds,
+        peak RSS, bytes read/written and wall time.
+        """
+        supervisor = JobSupervisor(limits, cancel_event)
+        cgroup = JobCgroup(job_id, limits) if JobCgroup.available() else None
+        
+        with tempfile.TemporaryDirectory() as log_dir:
+            stdout_path = os.path.join(log_dir, "stdout.log")
+            stderr_path = os.path.join(log_dir, "stderr.log")
+            tails = [
+                (OutputTail(stdout_path), on_stdout),
+                (OutputTail(stderr_path), on_stderr)
+            ]
+            
+            def forward(final: bool = False) -> None:
+                for tail, callback in tails:
+                    for line in tail.read_lines(final):
+                        if callback is not None:
+                            callback(line)
+            
+            def poll() -> None:
+                forward()
+                supervisor.check()
+            
+            try:
+                if interpreter_pool.available():
+                    usage = interpreter_pool.run(script_path, cwd, stdout_path, stderr_path, limits,
+                                                 cgroup.path if cgroup else None,
+                                                 on_start=supervisor.attach, on_poll=poll)
+                else:
+                    usage = ScriptExecutor._run_cold(script_path, cwd, stdout_path, stderr_path,
+                                                     limits, cgroup, supervisor, poll)
+            finally:
+                if cgroup is not None:
+                    cgroup.remove()
+            
+            forward(final=True)
+        
+        return {
+            "returncode": usage["returncode"],
+            "timed_out": supervisor.timed_out,
+            "wall_time": round(supervisor.elapsed(), 3),
+            "cpu_seconds": round(usage.get("cpu_user", 0) + usage.get("cpu_system", 0), 3),
+            "max_rss": usage.get("max_rss"),
+            "read_bytes": usage.get("read_bytes"),
+            "write_bytes": usage.get("write_bytes"),
+            "limits": limits
+        }
+    
+    @staticmethod
+    def _run_cold(script_path: str, cwd: str, stdout_path: str, stderr_path: str,
+                  limits: Dict[str, Any], cgroup: Optional[JobCgroup],
+                  supervisor: JobSupervisor, poll: Callable[[], None]) -> Dict[str, Any]:
+        """Run a script in a freshly spawned interpreter."""
+        with open(stdout_path, 'wb') as stdout, open(stderr_path, 'wb') as stderr:
+            process = subprocess.Popen(
+                [sys.executable, "-u", script_path],
+                stdout=stdout,
+                stderr=stderr,
+                cwd=cwd
+            )
+        
+        if not hasattr(os, "wait4"):
+            # No resource accounting or limits on this platform
+            supervisor.attach(process.pid)
+            while True:
+                try:
+                    return {"returncode": process.wait(timeout=CANCEL_POLL_INTERVAL)}
+                except subprocess.TimeoutExpired:
+                    poll()
+        
+        # Limits are applied right after the spawn, while the interpreter
+        # is still starting up
+        if cgroup is not None:
+            cgroup.add(process.pid)
+        apply_rlimits(limits, process.pid)
+        supervisor.attach(process.pid)
+        
+        while not has_exited(process.pid):
+            poll()
+            time.sleep(CANCEL_POLL_INTERVAL)
+        usage = reap(process.pid)
+        process.returncode = usage["returncode"]
+        return usage
     
     @staticmethod
     def get_script_templates() -> List[Dict[str, str]]:
-        """Get available script templates."""
+        """Get available script templates.
+
+        Each template also carries its declarative equivalent under
+        "pipeline", runnable through the pipeline endpoint.
+        """
         return [
             {
                 "name": "Basic Data Cleaning",
@@ -147,7 +649,11 @@ for col in df.columns:
     else:
         df[col] = df[col].fillna(df[col].mode()[0] if not df[col].mode().empty else 'Unknown')
 
-result = df"""
+result = df""",
+                "pipeline": [
+                    {"op": "dedupe"},
+                    {"op": "fillna", "strategy": "auto"}
+                ]
             },
             {
                 "name": "Filter Rows",
@@ -159,7 +665,10 @@ df = dataframes[list(dataframes.keys())[0]]  # Use first file
 if 'age' in df.columns:
     result = df[df['age'] > 30]
 else:
-    result = df"""
+    result = df""",
+                "pipeline": [
+                    {"op": "filter", "column": "age", "operator": ">", "value": 30}
+                ]
             },
             {
                 "name": "Group By and Aggregate",
@@ -171,7 +680,10 @@ df = dataframes[list(dataframes.keys())[0]]  # Use first file
 if 'category' in df.columns and 'value' in df.columns:
     result = df.groupby('category')['value'].mean().reset_index()
 else:
-    result = df"""
+    result = df""",
+                "pipeline": [
+                    {"op": "groupby", "by": ["category"], "aggregations": {"value": "mean"}}
+                ]
             },
             {
                 "name": "Merge DataFrames",
@@ -188,6 +700,9 @@ if len(dataframes) > 1:
         else:
             result = pd.concat([result, dataframes[file]], ignore_index=True)
 else:
-    result = dataframes[list(dataframes.keys())[0]]"""
+    result = dataframes[list(dataframes.keys())[0]]""",
+                "pipeline": [
+                    {"op": "join", "input": "rest", "on": ["id"], "how": "inner", "otherwise": "concat"}
+                ]
             }
         ]
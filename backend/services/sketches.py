@@ -0,0 +1,302 @@
+import math
+from typing import Dict, List, Any, Optional
+import numpy as np
+import pandas as pd
+from services.column_profiler import to_native
+
+_U64 = np.uint64
+
+
+def _canonical_strings(values: pd.Series) -> pd.Series:
+    """Render values as text that does not depend on the chunk's dtype.
+
+    Numbers, and text that parses as one (as it would have in a numeric
+    chunk), are written the same way whether they arrived as int64, float64
+    or object, so 1, 1.0 and "1" all become "1".
+    """
+    if pd.api.types.is_integer_dtype(values):
+        return values.astype(str)
+    text = values.astype(str)
+    if pd.api.types.is_bool_dtype(values):
+        return text
+    if pd.api.types.is_numeric_dtype(values):
+        numbers = values.astype('float64')
+    else:
+        numbers = pd.to_numeric(values, errors='coerce')
+        if not pd.api.types.is_float_dtype(numbers):
+            numbers = numbers.astype('float64')
+    parsed = numbers.notna()
+    integral = parsed & (numbers % 1 == 0) & (numbers >= -2**63) & (numbers < 2**63)
+    text = text.where(~parsed, numbers.astype(str))
+    return text.where(~integral, numbers[integral].astype(np.int64).astype(str))
+
+
+def _hash_values(values: pd.Series) -> np.ndarray:
+    """Hash values to uint64 consistently across chunks of varying dtype."""
+    return pd.util.hash_pandas_object(_canonical_strings(values), index=False).to_numpy(dtype=np.uint64)
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-count sketch with 2**precision registers."""
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    @classmethod
+    def for_error(cls, error: float) -> "HyperLogLog":
+        # Relative standard error is 1.04 / sqrt(m)
+        precision = math.ceil(math.log2((1.04 / error) ** 2))
+        return cls(min(max(precision, 4), 18))
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def update(self, values: pd.Series) -> None:
+        hashes = _hash_values(values)
+        if len(hashes) == 0:
+            return
+        p = _U64(self.precision)
+        index = (hashes >> (_U64(64) - p)).astype(np.int64)
+        # Remaining bits, with a sentinel so the leading-zero count is bounded
+        rest = (hashes << p) | (_U64(1) << (p - _U64(1)))
+
+        leading_zeros = np.zeros(len(rest), dtype=np.uint8)
+        for shift in (32, 16, 8, 4, 2, 1):
+            mask = rest < (_U64(1) << _U64(64 - shift))
+            leading_zeros[mask] += shift
+            rest[mask] <<= _U64(shift)
+
+        np.maximum.at(self.registers, index, leading_zeros + 1)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+
+class KLLSketch:
+    """KLL quantile sketch over numeric values.
+
+    Items at level h stand for 2**h original values; a level is compacted by
+    sorting it and promoting every other item once it exceeds its capacity.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def for_error(cls, error: float) -> "KLLSketch":
+        # Normalized rank error is roughly 1.7 / k
+        return cls(k=max(int(math.ceil(1.7 / error)), 8))
+
+    @property
+    def rank_error(self) -> float:
+        return 1.7 / self.k
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # Keep an odd leftover item at this level
+                leftover = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(leftover)]
+                promoted = pairs[int(self._rng.integers(2))::2]
+                self.levels[level] = leftover
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantiles(self, qs: List[float]) -> List[Optional[float]]:
+        if self.n == 0:
+            return [None for _ in qs]
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lvl), 2.0 ** h) for h, lvl in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items, cumulative = items[order], np.cumsum(weights[order])
+        total = cumulative[-1]
+        positions = np.searchsorted(cumulative, np.asarray(qs) * total, side='left')
+        positions = np.minimum(positions, len(items) - 1)
+        return [float(items[i]) for i in positions]
+
+
+class MisraGries:
+    """Mergeable heavy-hitters summary keeping at most k counters.
+
+    Every reported count underestimates the true count by at most n / (k + 1).
+    """
+
+    def __init__(self, k: int = 100):
+        self.k = k
+        self.n = 0
+        self.counters: Dict[Any, int] = {}
+
+    @classmethod
+    def for_error(cls, error: float) -> "MisraGries":
+        return cls(k=max(int(math.ceil(1 / error)), 1))
+
+    @property
+    def count_error(self) -> int:
+        return self.n // (self.k + 1)
+
+    def update(self, values: pd.Series) -> None:
+        counts = values.value_counts()
+        self.n += int(counts.sum())
+        self._add({to_native(value): int(count) for value, count in counts.items()})
+
+    def merge(self, other: "MisraGries") -> "MisraGries":
+        self.n += other.n
+        self._add(other.counters)
+        return self
+
+    def _add(self, counts: Dict[Any, int]) -> None:
+        for value, count in counts.items():
+            self.counters[value] = self.counters.get(value, 0) + count
+        if len(self.counters) > self.k:
+            # Subtracting the (k+1)-th largest count keeps at most k counters
+            threshold = sorted(self.counters.values(), reverse=True)[self.k]
+            self.counters = {
+                value: count - threshold
+                for value, count in self.counters.items()
+                if count > threshold
+            }
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        items = sorted(self.counters.items(), key=lambda item: item[1], reverse=True)
+        return [{'value': value, 'count': count} for value, count in items[:limit]]
+
+
+class ColumnSketch:
+    """Single-pass, mergeable approximate statistics for one column."""
+
+    def __init__(self, error: float = 0.01):
+        self.error = error
+        self.rows = 0
+        self.null_count = 0
+        self.dtypes = set()
+        self.numeric = True
+        self.distinct = HyperLogLog.for_error(error)
+        self.quantile_sketch = KLLSketch.for_error(error)
+        self.heavy_hitters = MisraGries.for_error(error)
+        # Exact running moments (count, mean, M2), min and max
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, col_data: pd.Series) -> None:
+        self.rows += len(col_data)
+        self.dtypes.add(str(col_data.dtype))
+        values = col_data.dropna()
+        self.null_count += len(col_data) - len(values)
+
+        self.distinct.update(values)
+        self.heavy_hitters.update(values)
+
+        is_numeric = pd.api.types.is_numeric_dtype(col_data) and not pd.api.types.is_bool_dtype(col_data)
+        if not is_numeric:
+            self.numeric = False
+        if self.numeric and len(values):
+            array = values.to_numpy(dtype=np.float64)
+            self.quantile_sketch.update(array)
+            self._merge_moments(len(array), float(array.mean()),
+                                float(((array - array.mean()) ** 2).sum()),
+                                float(array.min()), float(array.max()))
+
+    def _merge_moments(self, count: int, mean: float, m2: float, lo: float, hi: float) -> None:
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+
+    def merge(self, other: "ColumnSketch") -> "ColumnSketch":
+        self.rows += other.rows
+        self.null_count += other.null_count
+        self.dtypes |= other.dtypes
+        self.numeric = self.numeric and other.numeric
+        self.distinct.merge(other.distinct)
+        self.heavy_hitters.merge(other.heavy_hitters)
+        self.quantile_sketch.merge(other.quantile_sketch)
+        if other.count:
+            self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def dtype(self) -> str:
+        if len(self.dtypes) == 1:
+            return next(iter(self.dtypes))
+        return 'float64' if self.numeric else 'object'
+
+    def result(self, column: str, quantiles: List[float], top_k: int = 10) -> Dict[str, Any]:
+        top_values = self.heavy_hitters.top(top_k)
+        stats = {
+            'column': column,
+            'dtype': self.dtype(),
+            'mode': 'approx',
+            'count': self.rows - self.null_count,
+            'null_count': self.null_count,
+            'unique_count': self.distinct.estimate(),
+            'top_values': top_values,
+            'most_common': top_values[0]['value'] if top_values else None,
+            'error_bounds': {
+                'unique_count_relative_error': self.distinct.relative_error,
+                'top_values_count_error': self.heavy_hitters.count_error
+            }
+        }
+
+        if self.numeric and self.count:
+            values = self.quantile_sketch.quantiles([0.5] + quantiles)
+            stats.update({
+                'min': to_native(self.min),
+                'max': to_native(self.max),
+                'mean': to_native(self.mean),
+                'median': values[0],
+                'std': to_native(math.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else None,
+                'quantiles': {str(q): v for q, v in zip(quantiles, values[1:])}
+            })
+            stats['error_bounds']['quantile_rank_error'] = self.quantile_sketch.rank_error
+
+        return stats
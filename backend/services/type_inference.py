@@ -0,0 +1,138 @@
+import os
+from typing import Dict, Any
+import numpy as np
+import pandas as pd
+
+# Values per column the candidate types are checked against before being
+# confirmed on the whole column
+TYPE_SAMPLE_ROWS = int(os.getenv("TYPE_SAMPLE_ROWS", 10_000))
+# Text columns with at most this many distinct values, and at most this
+# share of distinct values in the sample, are inferred as categorical
+CATEGORY_MAX_UNIQUE = int(os.getenv("CATEGORY_MAX_UNIQUE", 1000))
+CATEGORY_MAX_RATIO = 0.5
+# Candidate types are tried on this many sampled values before the whole
+# sample, so most candidates are rejected after a tiny parse
+PROBE_ROWS = 100
+
+# Tried in order; the first one every sampled value parses with wins, unless
+# its ambiguous counterpart parses them all too
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y/%m/%d",
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+    "%d.%m.%Y"
+]
+# Formats that read the same text with day and month swapped; values whose
+# day is at most 12 parse with both
+AMBIGUOUS_DATE_FORMATS = {"%d/%m/%Y": "%m/%d/%Y", "%m/%d/%Y": "%d/%m/%Y"}
+BOOLEAN_VALUES = {"true", "false", "yes", "no", "y", "n", "t", "f"}
+
+
+def _integral(values: pd.Series) -> bool:
+    """Whether every value is a whole number an int64 can hold."""
+    return bool(((values % 1 == 0) & (values >= -2**63) & (values < 2**63)).all())
+
+
+def _parses_as_dates(values: pd.Series, date_format: str) -> pd.Series:
+    return pd.to_datetime(values, format=date_format, errors="coerce").notna()
+
+
+def sample_values(values: pd.Series, rows: int = TYPE_SAMPLE_ROWS) -> pd.Series:
+    """Up to rows non-null values spread evenly over the column."""
+    if len(values) > rows:
+        values = values.iloc[np.linspace(0, len(values) - 1, rows).astype(np.int64)]
+    return values.dropna()
+
+
+def _all(check, sample: pd.Series) -> bool:
+    """Whether check holds for every sampled value, probing a few first."""
+    return bool(check(sample.iloc[:PROBE_ROWS]).all() and check(sample).all())
+
+
+def infer_type(values: pd.Series, rows: int = TYPE_SAMPLE_ROWS) -> Dict[str, Any]:
+    """Infer the type of a column from a sample of its values.
+
+    Returns {"type": ...} with one of integer, float, boolean, date,
+    category, string or mixed (values of several Python types), plus the
+    "format" of dates, which is None when the values do not tell day-first
+    from month-first. Integral float columns within the int64 range and
+    True/False columns with missing values are reported as nullable. The
+    result only holds for the whole column once confirm_type agrees.
+    """
+    sample = sample_values(values, rows)
+    if values.dtype == bool:
+        return {"type": "boolean"}
+    if pd.api.types.is_integer_dtype(values):
+        return {"type": "integer"}
+    if pd.api.types.is_float_dtype(values):
+        if len(sample) and _integral(sample):
+            return {"type": "integer", "nullable": True}
+        return {"type": "float"}
+    if values.dtype != object or sample.empty:
+        return {"type": "string"}
+    inferred_dtype = pd.api.types.infer_dtype(sample, skipna=True)
+    if inferred_dtype == "boolean":
+        # True/False with missing values
+        return {"type": "boolean", "nullable": True}
+    if inferred_dtype != "string":
+        return {"type": "mixed"}
+
+    for date_format in DATE_FORMATS:
+        if _all(lambda part: _parses_as_dates(part, date_format), sample):
+            counterpart = AMBIGUOUS_DATE_FORMATS.get(date_format)
+            if counterpart and _parses_as_dates(sample, counterpart).all():
+                return {"type": "date", "format": None}
+            return {"type": "date", "format": date_format}
+
+    if _all(lambda part: part.str.lower().isin(BOOLEAN_VALUES), sample):
+        return {"type": "boolean"}
+
+    if _all(lambda part: pd.to_numeric(part, errors="coerce").notna(), sample):
+        numbers = pd.to_numeric(sample)
+        return {"type": "integer" if (numbers % 1 == 0).all() else "float"}
+
+    unique = sample.nunique()
+    if unique <= CATEGORY_MAX_UNIQUE and unique <= len(sample) * CATEGORY_MAX_RATIO:
+        return {"type": "category"}
+    return {"type": "string"}
+
+
+def confirm_type(values: pd.Series, inferred: Dict[str, Any]) -> bool:
+    """Check a type inferred from a sample against every value of a column.
+
+    Types that only describe how values are stored (category, string) and
+    types pandas already enforced through the dtype need no check.
+    """
+    kind = inferred["type"]
+    values = values.dropna()
+    if kind == "integer" and inferred.get("nullable"):
+        return _integral(values)
+    if kind == "boolean" and inferred.get("nullable"):
+        return pd.api.types.infer_dtype(values) == "boolean"
+    if values.dtype != object or kind in ("category", "string", "mixed"):
+        return True
+    if kind == "date":
+        formats = [inferred["format"]] if inferred["format"] else list(AMBIGUOUS_DATE_FORMATS)
+        return any(bool(_parses_as_dates(values, date_format).all()) for date_format in formats)
+    if kind == "boolean":
+        return bool(values.str.lower().isin(BOOLEAN_VALUES).all())
+    if kind in ("integer", "float"):
+        return bool(pd.to_numeric(values, errors="coerce").notna().all())
+    return True
+
+
+def infer_column_type(values: pd.Series, rows: int = TYPE_SAMPLE_ROWS) -> Dict[str, Any]:
+    """Infer a column's type from a sample and confirm it where the sample
+    did not cover the whole column; unconfirmed text columns are strings."""
+    inferred = infer_type(values, rows)
+    if values.count() > rows and inferred["type"] == "date" and inferred["format"] is None:
+        # Values outside the sample may tell day and month apart
+        return infer_type(values, len(values))
+    if values.count() > rows and not confirm_type(values, inferred):
+        if values.dtype == object and not inferred.get("nullable"):
+            return {"type": "string"}
+        return infer_type(values, len(values))
+    return inferred
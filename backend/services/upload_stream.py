@@ -0,0 +1,112 @@
+import os
+import csv
+import hashlib
+from typing import Dict, Any, Optional
+import aiofiles
+from fastapi import UploadFile
+from services.compression import Decompressor, compression_of
+from services.row_index import RowIndex, RowIndexBuilder
+
+# Uploads are copied to disk in fixed-size chunks so memory per upload stays
+# bounded regardless of file size.
+CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", 5 * 1024**3))
+# Compressed uploads are rejected once their data decompresses to more
+MAX_DECOMPRESSED_SIZE = int(os.getenv("MAX_DECOMPRESSED_SIZE", 50 * 1024**3))
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+class UploadCorrupt(Exception):
+    """Raised when a compressed upload cannot be decompressed."""
+
+
+async def stream_upload(file: UploadFile, dest_path: str,
+                        max_size: int = MAX_UPLOAD_SIZE,
+                        chunk_size: int = CHUNK_SIZE,
+                        max_data_size: int = MAX_DECOMPRESSED_SIZE) -> Dict[str, Any]:
+    """Stream an upload to dest_path and collect size, hash, rows and header.
+
+    The file is written to a temporary name and renamed into place only once
+    it is complete, so readers never see a partial upload. Compressed uploads
+    (see services.compression) are stored as sent; size and hash are those
+    of the stored bytes, rows and header those of the decompressed data,
+    which is indexed in pieces of at most chunk_size bytes and limited to
+    max_data_size bytes.
+    """
+    directory, name = os.path.split(dest_path)
+    part_path = os.path.join(directory, f".{name}.part")
+
+    digest = hashlib.sha256()
+    row_index = RowIndexBuilder()
+    size = 0
+    data_size = 0
+    header_bytes = b''
+    header_done = False
+
+    def index(data: bytes) -> None:
+        nonlocal data_size, header_bytes, header_done
+        data_size += len(data)
+        if data_size > max_data_size:
+            raise UploadTooLarge(
+                f"File {file.filename} decompresses to more than the maximum of {max_data_size} bytes"
+            )
+        row_index.feed(data)
+
+        if not header_done:
+            header_bytes += data[:MAX_HEADER_BYTES]
+            if b'\n' in header_bytes or len(header_bytes) >= MAX_HEADER_BYTES:
+                header_done = True
+
+    decompressor = Decompressor(compression_of(dest_path), index, chunk_size)
+
+    try:
+        async with aiofiles.open(part_path, 'wb') as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(
+                        f"File {file.filename} exceeds the maximum upload size of {max_size} bytes"
+                    )
+
+                digest.update(chunk)
+                decompressor.feed(chunk)
+                await out.write(chunk)
+
+        decompressor.finish()
+        os.replace(part_path, dest_path)
+    except ValueError as e:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise UploadCorrupt(f"File {file.filename} is not valid compressed data: {e}")
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    # The row index is built on the way in, so the file never needs a
+    # separate scan to count or page through rows.
+    index = RowIndex.save(dest_path, row_index.finish())
+
+    return {
+        "size": size,
+        "content_hash": digest.hexdigest(),
+        "row_count": index["rows"],
+        "columns": _sniff_header(header_bytes),
+    }
+
+
+def _sniff_header(header_bytes: bytes) -> Optional[list]:
+    first_line = header_bytes.split(b'\n', 1)[0].rstrip(b'\r')
+    if not first_line:
+        return None
+    text = first_line.decode('utf-8-sig', errors='replace')
+    # The comma-separated, double-quoted dialect pandas reads every file with
+    return next(csv.reader([text], csv.excel), None)
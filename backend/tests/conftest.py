@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend imports its modules as top-level packages (services, routers)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,129 @@
+import asyncio
+import functools
+import gzip
+
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.compression import Decompressor
+from services.upload_stream import stream_upload, UploadTooLarge
+
+DATA = b"a,b\n" + b"1,2\n" * 10000
+
+
+def decompress(compression, blob, chunk_size=777, piece_size=4096):
+    """Feed blob in chunks and return what was decoded and the largest piece."""
+    pieces = []
+    decompressor = Decompressor(compression, pieces.append, piece_size)
+    for start in range(0, len(blob), chunk_size):
+        decompressor.feed(blob[start:start + chunk_size])
+    decompressor.finish()
+    return b''.join(pieces), max((len(piece) for piece in pieces), default=0)
+
+
+def zstd(data, **kwargs):
+    return zstandard.ZstdCompressor(**kwargs).compress(data)
+
+
+def skippable_frame(payload, magic=0x184D2A50):
+    return magic.to_bytes(4, "little") + len(payload).to_bytes(4, "little") + payload
+
+
+class FakeUpload:
+    def __init__(self, data, filename):
+        self.data = data
+        self.filename = filename
+        self.position = 0
+
+    async def read(self, size):
+        chunk = self.data[self.position:self.position + size]
+        self.position += size
+        return chunk
+
+
+@pytest.mark.parametrize("compression, blob", [
+    ("gzip", gzip.compress(DATA)),
+    ("zstd", zstd(DATA)),
+    ("zstd", zstd(DATA, write_checksum=True, write_content_size=False)),
+], ids=["gzip", "zstd", "zstd-checksum"])
+def test_round_trip_in_bounded_pieces(compression, blob):
+    data, largest = decompress(compression, blob)
+    assert data == DATA
+    assert largest <= 4096
+
+
+def test_concatenated_gzip_members():
+    blob = gzip.compress(DATA) + gzip.compress(b"3,4\n")
+    assert decompress("gzip", blob)[0] == DATA + b"3,4\n"
+
+
+def test_concatenated_zstd_frames():
+    blob = zstd(DATA) + zstd(b"3,4\n", write_checksum=True)
+    assert decompress("zstd", blob)[0] == DATA + b"3,4\n"
+
+
+def test_skippable_zstd_frames():
+    blob = skippable_frame(b"meta") + zstd(DATA) + skippable_frame(b"x" * 5000, 0x184D2A5F)
+    assert decompress("zstd", blob)[0] == DATA
+
+
+@pytest.mark.parametrize("compression, blob", [
+    ("gzip", gzip.compress(DATA)),
+    ("gzip", gzip.compress(DATA) + gzip.compress(DATA)),
+    ("zstd", zstd(DATA)),
+    ("zstd", zstd(DATA, write_checksum=True)),
+    ("zstd", zstd(DATA) + zstd(DATA)),
+], ids=["gzip", "gzip-members", "zstd", "zstd-checksum", "zstd-frames"])
+def test_truncated_data(compression, blob):
+    for end in (1, 10, len(blob) // 3, len(blob) - 1):
+        with pytest.raises(ValueError):
+            decompress(compression, blob[:end])
+
+
+def test_truncated_skippable_zstd_frame():
+    with pytest.raises(ValueError, match="truncated"):
+        decompress("zstd", zstd(DATA) + skippable_frame(b"meta")[:-2])
+
+
+@pytest.mark.parametrize("compression, blob", [
+    ("gzip", gzip.compress(DATA) + b"trailing garbage"),
+    ("zstd", zstd(DATA) + b"trailing garbage"),
+], ids=["gzip", "zstd"])
+def test_trailing_garbage(compression, blob):
+    with pytest.raises(ValueError, match="Invalid"):
+        decompress(compression, blob)
+
+
+@pytest.mark.parametrize("name, blob", [
+    ("bomb.csv.gz", gzip.compress(DATA)),
+    ("bomb.csv.zst", zstd(DATA)),
+])
+def test_decompressed_size_limit(tmp_path, name, blob):
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(stream_upload(FakeUpload(blob, name), str(tmp_path / name),
+                                  chunk_size=1024, max_data_size=len(DATA) - 1))
+    assert list(tmp_path.iterdir()) == []
+
+    result = asyncio.run(stream_upload(FakeUpload(blob, name), str(tmp_path / name),
+                                       chunk_size=1024, max_data_size=len(DATA)))
+    assert result["row_count"] == 10000
+
+
+def test_decompressed_size_limit_is_413(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from routers import upload
+
+    monkeypatch.setattr(upload, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(upload, "stream_upload",
+                        functools.partial(stream_upload, max_data_size=len(DATA) - 1))
+    app = FastAPI()
+    app.include_router(upload.router)
+
+    response = TestClient(app).post(
+        "/api/upload/files",
+        files={"files": ("bomb.csv.zst", zstd(DATA), "application/zstd")},
+    )
+    assert response.status_code == 413
+    assert "decompresses to more than" in response.json()["detail"]